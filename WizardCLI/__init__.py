@@ -16,7 +16,7 @@ Create basic Python CLI:
     >>> cli.run()
 """
 from .tools import exectime, gram, Benchmark
-from .core import  CLI, File, optional
+from .core import  CLI, CommandError, Cancelled, CancelToken, ParallelError, Group, CachePolicy, History, Table, Pager, File, optional, converter, tokenize
 from colorama import init
 from .styles import (
     fg, rst, bld, itl, und, rev, 
@@ -28,7 +28,7 @@ __encoding__ = 'UTF-8'
 __author__ = 'Overdjoker048'
 __version__ = '1.5.1'
 __all__ = (
-    "CLI", "File", "optional",
+    "CLI", "CommandError", "Cancelled", "CancelToken", "ParallelError", "Group", "CachePolicy", "History", "Table", "Pager", "File", "optional", "converter", "tokenize",
     "exectime", "gram", "Benchmark",
     "fg", "bg", "rst", "bld", "itl", "und", "rev", "strk",
     "gradiant", "strimg"
@@ -0,0 +1,53 @@
+"""
+Client of CLI.serve.
+
+Sends its arguments to a CLI served on a Unix socket and displays the output
+of the command as it arrives. It only uses the standard library, so running
+the file directly does not import WizardCLI nor the application:
+    python WizardCLI/client.py /tmp/app.sock hello --name World
+"""
+from json import dumps
+from socket import socket, AF_UNIX, SOCK_STREAM
+from struct import unpack
+import sys
+
+
+def main(argv: list = None) -> int:
+    """Runs a command on a served CLI and returns its exit code.
+
+    Arguments:
+        argv (list, optional): Path of the socket followed by the command line. Defaults to sys.argv[1:].
+
+    Return:
+        int: Exit code of the command, 1 if the connection failed or was interrupted.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        sys.stderr.write("Usage: client.py SOCKET [COMMAND [ARGUMENTS...]]\n")
+        return 2
+    try:
+        with socket(AF_UNIX, SOCK_STREAM) as sock:
+            sock.connect(argv[0])
+            sock.sendall(dumps(argv[1:]).encode("UTF-8") + b"\n")
+            stream = sock.makefile("rb")
+            while True:
+                header = stream.read(5)
+                if len(header) < 5:
+                    sys.stderr.write("Connection closed by the server.\n")
+                    return 1
+                kind, size = unpack("!cI", header)
+                data = stream.read(size)
+                if kind == b"x":
+                    return int(data)
+                sys.stdout.write(data.decode("UTF-8"))
+                sys.stdout.flush()
+    except OSError as e:
+        sys.stderr.write(f"Cannot reach {argv[0]}: {e}\n")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
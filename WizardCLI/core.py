@@ -1,25 +1,71 @@
-from os import path as ospath, name, kill, getpid, stat, rename
-from typing import Union, Optional
-from time import sleep
-from inspect import Signature, signature
-from shlex import split as splitS
-from functools import wraps
-from threading import Thread, Lock
-from shutil import move, copy2
+from os import path as ospath, name, stat, rename, remove, PathLike, _exit
+import os
+from stat import S_ISSOCK
+from json import loads, dumps
+from csv import writer as csv_writer
+from dataclasses import is_dataclass, fields
+from struct import pack
+import sys
+import atexit
+from weakref import WeakValueDictionary
+from sys import stdin, argv as sysargv
+from typing import Union, Optional, NamedTuple, Literal, get_origin, get_args
+from types import UnionType, NoneType
+from enum import Enum
+from time import sleep, perf_counter, perf_counter_ns, monotonic, strftime
+from string import Formatter
+from inspect import Signature, signature, iscoroutine, iscoroutinefunction
+from contextvars import ContextVar, copy_context
+from shlex import split as splitS, quote
+from re import compile as recompile, DOTALL
+from functools import wraps, partial
+from importlib import import_module
+from itertools import islice, chain
+from threading import Thread, Timer, Lock, RLock, Event, get_ident
+from queue import Queue, Full
+from collections.abc import Iterator, Iterable
+from collections import Counter, OrderedDict, deque
+from heapq import nsmallest
+from bisect import bisect_left, bisect_right, insort
+from math import ceil
+from concurrent.futures import ThreadPoolExecutor, Future, wait as waitF, TimeoutError as FutureTimeout
+from contextlib import redirect_stdout
+from glob import glob
+from io import StringIO
+from codecs import getincrementaldecoder
+from shutil import move, copy2, get_terminal_size
+from array import array
+from mmap import mmap, ACCESS_READ
 
 class CLI:
-    __slots__ = ('__cmd', '__prompt', 'user', '__path', '__strformat', '__allow_cmd')
+    __slots__ = ('__root', '__prompt', 'user', '__path', '__out', '__allow_cmd', '__ready', '__loop',
+                 '__workers', '__pool', '__jobs', '__job_id', '__capture', '__pipe_buffer', '__matches', '__history',
+                 '__fanout', '__hooks', '__closed', '__builtins')
     def __init__(self,
                  prompt: str = "[{}]@[{}]\\>",
                  user: str = "Python-Cli",
-                 formating: str = "{}"
+                 formating: str = "{}",
+                 workers: int = 4,
+                 pipe_buffer: int = 1024,
+                 flush: str = "command",
+                 buffer: int = 65536,
+                 abbrev: bool = True,
+                 history: Union[str, PathLike, None] = None
                  ) -> None:
         """This object allows the creation of the CLI.
 
         Arguments:
-            prompt (str): Text displayed in terminal when entering commands. Defaults to "[{}]@[{}]\\>".
+            prompt (str): Text displayed in terminal when entering commands, the first {} being the user and the second the path.
+                Named fields: {user}, {path}, {duration} of the last command, {clock}, {branch} (git), {load} and the segments added with CLI.segment.
+                Defaults to "[{}]@[{}]\\>".
             user (str): Username displayed in prompt. Defaults to "Python-Cli".
             formating (str): Text format for the prompt. Defaults to "".
+            workers (int): Maximum number of background jobs running at the same time. Defaults to 4.
+            pipe_buffer (int): Maximum number of items buffered between two commands of a pipeline. Defaults to 1024.
+            flush (str): When the displayed text is flushed: "command", "size" or "idle". Defaults to "command".
+            buffer (int): Number of characters buffered before the text is flushed. Defaults to 65536.
+            abbrev (bool): Allow commands to be called by a unique prefix of their name or alias. Defaults to True.
+            history (str | PathLike, optional): File keeping the command lines entered in the prompt, None to disable the history. Defaults to None.
 
         Example of use:
             >>> import WizardCLI
@@ -30,265 +76,3157 @@ class CLI:
             >>> cli.run()
         """
 
-        self.__cmd = {}
-        self.__prompt = prompt
+        self.__root = Group(abbrev=abbrev)
+        self.__matches = []
+        self.__prompt = _Prompt(prompt)
+        self.__prompt.segment("clock", 1.0)(lambda: strftime("%H:%M:%S"))
+        self.__prompt.segment("branch", 2.0)(self.__branch)
+        self.__prompt.segment("load", 5.0)(lambda: f"{os.getloadavg()[0]:.2f}" if hasattr(os, "getloadavg") else "")
         self.user = user
         self.__path = ospath.dirname(__file__)
-        self.__strformat = formating.format
+        self.__out = Output(formating, flush, buffer)
         self.__allow_cmd = {
             "help": True,
             "leave": True,
             "clear_host": True,
-            "change_directory": True
+            "change_directory": True,
+            "jobs": True,
+            "stats": True,
+            "history": True,
+            "view": True
         }
-        if self.__allow_cmd["help"]:
-            self.command(alias=["?"], doc=self.help.__doc__)(self.help)
-        if self.__allow_cmd["clear-host"]:
-            self.command(alias=["cls" if name == 'nt' else "clear"], name="clear-host", doc=self.clear_host.__doc__)(self.clear_host)
-        if self.__allow_cmd["leave"]:
-            self.command(alias=["exit"], doc=self.leave.__doc__)(self.leave)
-        if self.__allow_cmd["change_directory"]:
-            @self.command(alias=["cd"], doc=self.change_directory.__doc__)
+        self.__ready = False
+        self.__builtins = set()
+        self.__loop = None
+        self.__workers = workers
+        self.__pool = None
+        self.__jobs = {}
+        self.__job_id = 0
+        self.__capture = None
+        self.__fanout = {}
+        self.__hooks = []
+        self.__closed = False
+        self.__pipe_buffer = pipe_buffer
+        self.__history = None if history is None else History(history)
+
+    def __setup(self) -> None:
+        "Registers the built-in commands allowed for the interactive CLI."
+        if self.__ready:
+            return
+        self.__ready = True
+        for cmd, active in self.__allow_cmd.items():
+            if active:
+                self.__builtin(cmd, True)
+
+    def __builtin(self, cmd: str, active: bool) -> None:
+        "Registers or removes the commands of a built-in."
+        if not active:
+            for i in _BUILTINS[cmd]:
+                if i in self.__builtins:
+                    self.__builtins.discard(i)
+                    self.__root.unregister(i)
+        elif cmd == "help":
+            self.__define(self.help, alias=["?"])
+        elif cmd == "clear_host":
+            self.__define(self.clear_host, "clear-host", ["cls" if name == 'nt' else "clear"])
+        elif cmd == "leave":
+            self.__define(self.leave, alias=["exit"])
+        elif cmd == "change_directory":
             @optional(self.__path)
             def change_directory(path) -> None:
                 self.change_directory(path)
+            self.__define(change_directory, alias=["cd"], doc=self.change_directory.__doc__)
+        elif cmd == "jobs":
+            @optional(None)
+            def wait(job: int) -> None:
+                self.wait(job)
+            for func in (self.jobs, self.fg, self.cancel):
+                self.__define(func)
+            self.__define(wait, doc=self.wait.__doc__)
+        elif cmd == "stats":
+            self.__define(self.stats)
+        elif cmd == "history" and self.__history is not None:
+            @optional("", False, 20)
+            def history(text: str, prefix=True, limit: int = 20) -> None:
+                if text:
+                    entries = list(islice(self.__history.search(text, prefix), limit))[::-1]
+                else:
+                    entries = self.__history.tail(limit)
+                for index, entry in entries:
+                    self.echo(f"{index + 1:>6}  {entry}")
+            self.__define(history, doc="Lists the last command lines, or the last ones containing text (starting with it with -prefix). Run one again with !number or !text.")
+        elif cmd == "view":
+            self.__define(self.view)
+
+    def __define(self, func: callable, cmd: Optional[str] = None, alias: list = [], doc: Optional[str] = None) -> None:
+        "Registers the command of a built-in, unless a command of the user already has its name, and without the aliases taken by the user."
+        cmd = cmd if cmd else func.__name__
+        if self.__root.get(cmd) is not None:
+            return
+        alias = [i for i in alias if self.__root.get(i) is None]
+        self.command(name=cmd, alias=alias, doc=doc if doc else func.__doc__)(func)
+        self.__builtins.add(cmd)
+
+    def allow(self, cmd: str, active: bool = True) -> None:
+        """Enable or disable built-in CLI commands.
+
+        Available commands that can be controlled:
+            - "help": Show available commands and their usage
+            - "leave": Exit the CLI
+            - "clear_host": Clear the terminal screen
+            - "change_directory": Change current working directory
+            - "jobs": Background jobs commands (jobs, wait, fg, cancel)
+            - "stats": Latency statistics of the commands
+            - "history": Command history, when the CLI has a history file
+            - "view": Pager for text files
+        Default commandes are enable. A built-in never replaces a command of the same name registered by the user.
+
+        Arguments:
+            cmd (str): Name of the command to enable/disable.
+            active (bool, optional): True to enable the command, False to disable it. Defaults to True.
+
+        Example:
+            >>> cli = WizardCLI.CLI()
+            >>> cli.allow("help", False)  # Disable help command
+            >>> cli.allow("leave", False) # Disable ability to exit
+            >>> cli.allow("clear_host", False) # Disable screen clearing
+            >>> cli.allow("change_directory", False) # Disable cd command
+
+            # Re-enable a command
+            >>> cli.allow("help", True)
+        """
+        if cmd in self.__allow_cmd:
+            if self.__ready and self.__allow_cmd[cmd] != active:
+                self.__builtin(cmd, active)
+            self.__allow_cmd[cmd] = active
+
+    def command(self,
+                name: Optional[str] = None,
+                doc: Optional[str] = None,
+                alias : list = [],
+                pipe: Optional[str] = None,
+                cache: Optional['CachePolicy'] = None,
+                parallel: Optional[str] = None,
+                pool: str = "threads",
+                timeout: Optional[float] = None
+                ) -> callable:
+        """The command decorator allows you to define a function as a command for the CLI.
+
+        Arguments:
+            name (str, optional): Name of the command. Defaults to function name.
+            doc (str, optional): Documentation for the command. Defaults to function docstring.
+            alias (list): List of alternative names for the command. Defaults to [].
+            pipe (str, optional): Parameter receiving the items produced by the previous command of a pipeline. Defaults to None.
+            cache (CachePolicy, optional): Cache the results of the command by arguments. Defaults to None.
+            parallel (str, optional): Argument taking any number of values, the command being called once per value in a pool. Defaults to None.
+            pool (str, optional): Pool of the parallel calls: "threads" or "processes", the function must then be importable. Defaults to "threads".
+            timeout (float, optional): Seconds after which the command is cancelled, see CLI.token. Defaults to None.
+
+        Return:
+            Callable: Decorated function that becomes a CLI command.
+
+        Example of use:
+            >>> import WizardCLI
+            >>> cli = WizardCLI.CLI()
+            >>> @cli.command()
+            >>> def hello_world():
+            ...    print("Hello World")
+            >>> cli.run()
+
+            >>> @cli.command()
+            >>> def numbers(n: int):
+            ...    yield from range(n)
+            >>> @cli.command(pipe="items")
+            >>> def double(items):
+            ...    for i in items:
+            ...        yield i * 2
+            # numbers 10 | double
+
+            >>> @cli.command(cache=WizardCLI.CachePolicy(maxsize=256, ttl=60))
+            >>> def lookup(user: str):
+            ...    return backend.fetch(user)
+
+            >>> @cli.command(parallel="image")
+            >>> def resize(image: str, width: int = 800):
+            ...    print("Resized", image)
+            # resize *.png --width 400
+
+            >>> @cli.command(timeout=30)
+            >>> def crawl(url: str):
+            ...    for page in pages(url):
+            ...        cli.token.check()
+            ...        index(page)
+        """
+        return self.__root.command(name, doc, alias, pipe, cache, parallel, pool, timeout)
+
+    def lazy_command(self,
+                     target: str,
+                     name: Optional[str] = None,
+                     doc: Optional[str] = None,
+                     alias: list = [],
+                     **options: any
+                     ) -> None:
+        """Registers a command without importing the module that defines it.
+        The module is imported the first time the command is called, until then help and completion
+        only know the name, documentation and aliases given here.
+
+        Arguments:
+            target (str): Import path of the function, as "package.module:function".
+            name (str, optional): Name of the command. Defaults to the function name.
+            doc (str, optional): Documentation shown by help before the module is imported. Defaults to the function docstring once imported.
+            alias (list): List of alternative names for the command. Defaults to [].
+            **options: Other arguments of the command decorator, used when the module is imported.
+
+        Example of use:
+            >>> import WizardCLI
+            >>> cli = WizardCLI.CLI()
+            >>> cli.lazy_command("analysis.fft:spectrum", doc="Computes the spectrum of a signal.")
+            >>> cli.run()
+        """
+        self.__root.lazy_command(target, name, doc, alias, **options)
+
+    def group(self,
+              name: str,
+              doc: Optional[str] = None,
+              alias: list = [],
+              target: Optional[str] = None
+              ) -> 'Group':
+        """Creates a group of subcommands called as "group command".
+
+        Arguments:
+            name (str): Name of the group.
+            doc (str, optional): Documentation of the group. Defaults to None.
+            alias (list): List of alternative names for the group. Defaults to [].
+            target (str, optional): Import path of a function registering the commands of the group,
+                as "package.module:function". The module is imported the first time the group is used. Defaults to None.
+
+        Return:
+            Group: The group, on which commands and subgroups are registered like on the CLI.
+
+        Example of use:
+            >>> import WizardCLI
+            >>> cli = WizardCLI.CLI()
+            >>> db = cli.group("db", doc="Database administration.")
+            >>> @db.command()
+            >>> def migrate(version: int):
+            ...    print("Migrating to", version)
+            >>> cli.group("report", target="reports.commands:register")
+            >>> cli.run()
+            # db migrate 3
+        """
+        return self.__root.group(name, doc, alias, target)
+
+    def segment(self, name: str, interval: float = 1.0) -> callable:
+        """Decorator adding a dynamic segment to the prompt, displayed by the {name} field.
+        The function is called in a background thread every interval seconds and the prompt
+        displays its last value, so a slow segment never delays the prompt.
+
+        Arguments:
+            name (str): Name of the field in the prompt.
+            interval (float, optional): Seconds between two calls of the function. Defaults to 1.0.
+
+        Example of use:
+            >>> cli = WizardCLI.CLI(prompt="[{user}]({tickets})\\>")
+            >>> @cli.segment("tickets", interval=30)
+            >>> def tickets():
+            ...    return len(tracker.open_tickets())
+        """
+        return self.__prompt.segment(name, interval)
+
+    def __branch(self) -> str:
+        "Returns the git branch of the location of the terminal, or the short hash of a detached head."
+        directory = self.__path
+        while True:
+            head = ospath.join(directory, ".git", "HEAD")
+            if ospath.isfile(head):
+                with open(head, encoding="UTF-8") as f:
+                    ref = f.read().strip()
+                return ref[16:] if ref.startswith("ref: refs/heads/") else ref[:7]
+            parent = ospath.dirname(directory)
+            if parent == directory:
+                return ""
+            directory = parent
+
+    @property
+    def history(self) -> Optional['History']:
+        """Returns the command history of the CLI, None if it has no history file."""
+        return self.__history
+
+    @property
+    def output(self) -> 'Output':
+        """Returns the buffered writer used by the CLI to display text."""
+        return self.__out
+
+    def echo(self, *values: any, sep: str = " ") -> None:
+        """Displays values through the buffered output of the CLI with the formating of the CLI.
+        Faster than print for commands that display a lot of lines.
+
+        Arguments:
+            *values: Values to display.
+            sep (str, optional): Separator between values. Defaults to " ".
+
+        Example of use:
+            >>> @cli.command()
+            >>> def hello(name: str = "World"):
+            ...    cli.echo("Hello", name)
+        """
+        self.__out.write(sep.join(map(str, values)))
+
+    def leave(self) -> None:
+        "Close the terminal."
+        if self.shutdown():
+            raise SystemExit(0)
+        sys.stdout.flush()
+        _exit(1)
+
+    def on_shutdown(self, func: callable) -> callable:
+        """Decorator registering a function called by CLI.shutdown once the background jobs are stopped,
+        the last registered being called first.
+
+        Example of use:
+            >>> @cli.on_shutdown
+            >>> def save_cache():
+            ...    with open("cache.json", "w") as f:
+            ...        json.dump(cache, f)
+        """
+        self.__hooks.append(func)
+        return func
+
+    def shutdown(self, grace: float = 5.0) -> bool:
+        """Stops the CLI in order: the background jobs (cancelled then awaited), the functions registered with
+        on_shutdown, so they save what the jobs wrote, the pending writes of the File objects, the history,
+        the pools and the output.
+        Each step runs in a thread and the steps still running when the grace period expires are abandoned.
+        The jobs get at most half of the grace period, so the steps after them still run.
+
+        Arguments:
+            grace (float, optional): Maximum number of seconds of the whole sequence. Defaults to 5.0.
+
+        Return:
+            bool: True if every step finished in time.
+        """
+        if self.__closed:
+            return True
+        self.__closed = True
+        deadline = monotonic() + grace
+        steps = [partial(self.__stop_jobs, deadline - grace / 2), *reversed(self.__hooks), _flush_files, self.__close]
+        for step in steps:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                self.echo("Shutdown grace period expired.")
+                self.__out.flush_all()
+                return False
+            thread = Thread(target=self.__step, args=(step,), name="WizardCLI-shutdown", daemon=True)
+            thread.start()
+            thread.join(remaining)
+        self.__out.flush_all()
+        return not thread.is_alive()
+
+    def __step(self, step: callable) -> None:
+        "Runs a step of the shutdown, reporting its error instead of stopping the sequence."
+        try:
+            step()
+        except Exception as e:
+            self.echo(f"Shutdown step {getattr(step, '__name__', step)} failed: {e}")
+        finally:
+            self.__out.flush()
+
+    def __stop_jobs(self, deadline: float) -> None:
+        "Cancels the background jobs and waits for them until the deadline, interrupting those still running."
+        for job in self.__jobs.values():
+            if not job.future.cancel():
+                job.token.cancel("Shutdown.")
+        futures = [job.future for job in self.__jobs.values()]
+        if waitF(futures, timeout=max(0, deadline - monotonic() - _GRACE)).not_done:
+            for job in self.__jobs.values():
+                self.__interrupt(job)
+            waitF(futures, timeout=max(0, deadline - monotonic()))
+
+    def __close(self) -> None:
+        "Closes the history and the pools of the CLI."
+        if self.__history is not None:
+            self.__history.close()
+        for pool in [self.__pool, *self.__fanout.values()]:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def clear_host(self) -> None:
+        "Reset the display of the terminal."
+        self.__out.flush()
+        print("\033[H\033[J", end="")
+
+    def help(self, m: bool = True, prefix: str = "", page: int = 0) -> None:
+        "Displays info about terminal commands."
+        height = max(1, get_terminal_size().lines - 2)
+        text = self.__root.help(m, prefix.lower(), page, height)
+        if not page and text.count("\n") >= height and self.__interactive():
+            self.page(text)
+        elif text:
+            self.echo(text)
+
+    def page(self, source: Union[str, 'File', Iterable]) -> None:
+        """Displays a long text with the pager of the CLI, or writes it at once when it is not displayed in a terminal.
+        Lines are only read from the source as far as the user scrolls or searches.
+
+        Arguments:
+            source (str | File | iterable): Text, file or iterable of lines, such as a generator or an open file.
+
+        Example of use:
+            >>> @cli.command()
+            >>> def logs(service: str):
+            ...    cli.page(journal.lines(service))
+        """
+        if isinstance(source, File):
+            source = source.lines()
+        elif isinstance(source, str):
+            source = source.splitlines()
+        self.__out.flush()
+        stream = sys.stdout
+        Pager(source).show(stream.target() if isinstance(stream, _Capture) else stream)
+
+    def view(self, path: str) -> None:
+        "Displays a text file one page at a time, / searches in it."
+        npath = ospath.join(self.__path, path)
+        if not ospath.isfile(npath):
+            npath = path
+        if not ospath.isfile(npath):
+            self.echo("The path is invalid.")
+            return
+        with open(npath, encoding="UTF-8", errors="replace") as f:
+            self.page(f)
+
+    def __interactive(self) -> bool:
+        "Checks that the current thread displays in a terminal, and not in a pipe, a file or a background job."
+        stream = sys.stdout
+        if isinstance(stream, _Capture):
+            stream = stream.target()
+        return stdin.isatty() and stream.isatty()
+
+    def change_directory(self, path: str) -> None:
+        "Allows you to change the location of the terminal in your files."
+        npath = ospath.join(self.__path, path)
+        if ospath.isdir(npath):
+            path = ospath.normpath(npath)
+        else:
+            path = ospath.normpath(path)
+        if ospath.isdir(path):
+            self.__path = str(path).title()
+        else:
+            self.echo("The path is invalid.")
+
+    def exec(self, cmd: dict, entry: list, pipe: Optional[object] = None) -> any:
+        """Runs commands entered by the user and returns the result of the command.
+        The meta-flag -? displays the information of the command, -! runs it under cProfile and displays its hottest functions,
+        and --output json|ndjson|table|csv renders the result of the command instead of returning it."""
+        start = perf_counter_ns()
+        plan = cmd["plan"]
+        kwargs = plan.defaults.copy()
+        if pipe is not None:
+            kwargs[plan.pipe] = pipe
+        args, nargs, flags = plan.args, plan.nargs, plan.flags
+        arg_i = 0
+        key = None
+        profile = False
+        output = None
+        tokens = iter(entry)
+        next(tokens, None)
+        try:
+            for arg in tokens:
+                if arg[:1] == "-":
+                    flag = flags.get(arg)
+                    if flag is None:
+                        if arg == "-?":
+                            self.echo(cmd["info"])
+                            return
+                        elif arg == "-!":
+                            profile = True
+                            continue
+                        elif arg == "--output":
+                            output = next(tokens, None)
+                            if output not in _RENDERERS:
+                                raise CommandError(f"Invalid output: {output}, expected {', '.join(_RENDERERS)}.")
+                            continue
+                        raise CommandError("Unknown Parameter" if arg[:2] == "--" else "Unknown Option")
+                    key, conv, valued = flag
+                    if valued:
+                        value = next(tokens, None)
+                        kwargs[key] = value if value is None or conv is None else conv(value)
+                    else:
+                        kwargs[key] = True
+                elif arg_i < nargs:
+                    key, conv = args[arg_i]
+                    kwargs[key] = arg if conv is None else conv(arg)
+                    arg_i += 1
+                elif plan.parallel is not None:
+                    key, conv, _ = plan.parallel
+                    values = kwargs.setdefault(key, [])
+                    for value in self.__glob(arg):
+                        values.append(value if conv is None else conv(value))
+                else:
+                    raise CommandError("Too many arguments provided.")
+        except (ValueError, TypeError) as e:
+            raise CommandError(f"Invalid value for {key}: {e}") from e
+        if profile:
+            result = self.__profile(plan, kwargs)
+        else:
+            result = self.__result(plan, kwargs, pipe, start)
+        if output is not None:
+            self.__render(result, output)
+            return None
+        return result
+
+    def __result(self, plan: '_Plan', kwargs: dict, pipe: Optional[object], start: int) -> any:
+        "Returns the result of a command from its cache or by calling it, and records its latency."
+        cache = plan.cache
+        key = None
+        try:
+            if cache is not None and pipe is None:
+                key = cache.key(kwargs)
+                if key is not None:
+                    hit, result = cache.get(key)
+                    if hit:
+                        return result
+            if plan.timeout is not None:
+                result = self.__supervise(plan, kwargs)
+            elif plan.parallel is None:
+                result = plan.function(**kwargs)
+            else:
+                result = self.__parallel(plan, kwargs)
+            if iscoroutine(result):
+                result = self.__await(result)
+            if key is not None and not isinstance(result, Iterator):
+                cache.put(key, result)
+            return result
+        finally:
+            plan.latency.add(perf_counter_ns() - start)
+
+    def __profile(self, plan: '_Plan', kwargs: dict, top: int = 15) -> any:
+        "Runs a command under cProfile and displays its hottest functions by cumulative time."
+        from cProfile import Profile
+        from pstats import Stats
+        profiler = Profile()
+        try:
+            if plan.parallel is None:
+                result = profiler.runcall(plan.function, **kwargs)
+            else:
+                result = profiler.runcall(self.__parallel, plan, kwargs)
+            if iscoroutine(result):
+                result = profiler.runcall(self.__await, result)
+            return result
+        finally:
+            report = StringIO()
+            Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+            self.echo(report.getvalue().strip("\n"))
+
+    def __render(self, result: any, output: str) -> None:
+        """Writes the result of a command with a renderer, without the formating of the CLI.
+        Tables displayed in a terminal go through the pager.
+        The rows of an iterator are written as they are produced: the first one at once, then in batches
+        of 64 while they come quickly and one by one when producing a row takes more than a millisecond."""
+        if result is None:
+            return
+        if output == "table" and self.__interactive():
+            self.page(_table(result))
+            return
+        self.__out.flush()
+        stream, lines, written, last = sys.stdout, [], False, perf_counter()
+        for line in _RENDERERS[output](result):
+            lines.append(line)
+            now = perf_counter()
+            if len(lines) >= 64 or now - last > 0.001 or not written:
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+                lines, written = [], True
+            last = perf_counter()
+        if lines:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+
+    def __supervise(self, plan: '_Plan', kwargs: dict) -> any:
+        """Runs a command with a timeout in a worker thread while the calling thread waits for it.
+        On timeout or Ctrl-C the token of the command is cancelled, and Cancelled is raised in the worker
+        if it is still running after a grace period."""
+        if plan.parallel is None and iscoroutinefunction(plan.function):
+            return self.__await(plan.function(**kwargs), plan.timeout)
+        token, done, lock, outcome = CancelToken(), Event(), Lock(), []
+        target = sys.stdout.target() if isinstance(sys.stdout, _Capture) else None
+        def worker() -> None:
+            _TOKEN.set(token)
+            if target is not None:
+                self.__capture.buffers[get_ident()] = target
+            try:
+                result = plan.function(**kwargs) if plan.parallel is None else self.__parallel(plan, kwargs)
+                if iscoroutine(result):
+                    result = self.__await(result)
+                outcome.append((result, None))
+            except BaseException as e:
+                outcome.append((None, e))
+            finally:
+                with lock:
+                    done.set()
+                self.__out.flush()
+                if target is not None:
+                    del self.__capture.buffers[get_ident()]
+        thread = Thread(target=copy_context().run, args=(worker,), name="WizardCLI-command", daemon=True)
+        thread.start()
+        try:
+            if not done.wait(plan.timeout):
+                raise Cancelled(f"Timed out after {plan.timeout}s.")
+        except BaseException as e:
+            token.cancel(str(e) if isinstance(e, Cancelled) else "Cancelled.")
+            if not done.wait(_GRACE):
+                with lock:
+                    if not done.is_set():
+                        _interrupt(thread.ident)
+                done.wait(_GRACE)
+            raise
+        result, error = outcome[0]
+        if error is not None:
+            raise error
+        return result
+
+    def __glob(self, value: str) -> list:
+        "Expands a value containing wildcards to the paths matching it, relative to the location of the terminal."
+        if "*" not in value and "?" not in value and "[" not in value:
+            return [value]
+        return sorted(glob(ospath.join(self.__path, value))) or [value]
+
+    def __parallel(self, plan: '_Plan', kwargs: dict) -> list:
+        """Calls the function of a command once per value of its parallel argument in a pool.
+        The outputs are displayed and the results returned in the order of the values."""
+        key, _, pool = plan.parallel
+        values = kwargs.pop(key, None)
+        if not values:
+            raise CommandError(f"No value provided for {key}.")
+        executor = self.__fanout.get(pool)
+        if executor is None:
+            if pool == "processes":
+                from concurrent.futures import ProcessPoolExecutor
+                executor = ProcessPoolExecutor(max_workers=self.__workers)
+            else:
+                executor = ThreadPoolExecutor(max_workers=self.__workers, thread_name_prefix="WizardCLI-parallel")
+            self.__fanout[pool] = executor
+        if pool == "processes":
+            futures = [executor.submit(_call, plan.function, {**kwargs, key: value}) for value in values]
+        else:
+            self.__redirect()
+            futures = [executor.submit(copy_context().run, self.__call, plan.function, {**kwargs, key: value}) for value in values]
+        self.__out.flush()
+        results, errors = [], []
+        try:
+            for value, future in zip(values, futures):
+                try:
+                    output, result, error = future.result()
+                except Exception as e:
+                    output, result, error = "", None, e
+                if output:
+                    sys.stdout.write(output)
+                if error is not None:
+                    errors.append((value, error))
+                results.append(result)
+        finally:
+            for future in futures:
+                future.cancel()
+        if errors:
+            raise ParallelError(errors, results)
+        return results
+
+    def __call(self, function: callable, kwargs: dict) -> tuple:
+        "Runs one call of a parallel command in a pool thread, capturing what it displays."
+        output = StringIO()
+        self.__capture.buffers[get_ident()] = output
+        try:
+            result, error = function(**kwargs), None
+            if iscoroutine(result):
+                result = self.__await(result)
+            if isinstance(result, Iterator):
+                result = list(result)
+        except Exception as e:
+            result, error = None, e
+        finally:
+            self.__out.flush()
+            del self.__capture.buffers[get_ident()]
+        return output.getvalue(), result, error
+
+    def stats(self, reset: bool = True) -> None:
+        "Displays count, mean and percentiles of the latency of the commands run, slowest total first."
+        rows = []
+        groups = [self.__root]
+        while groups:
+            group = groups.pop()
+            for name, cmd in group.records():
+                if "group" in cmd:
+                    groups.append(cmd["group"])
+                elif "plan" in cmd and cmd["plan"].latency.count:
+                    rows.append((f"{group.path} {name}".lstrip(), cmd["plan"].latency))
+        if not rows:
+            self.echo("No command has been run yet.")
+            return
+        rows.sort(key=lambda row: row[1].total, reverse=True)
+        width = max(7, max(len(row[0]) for row in rows))
+        lines = [f"{'Command':<{width}} {'Count':>8} {'Mean':>10} {'p50':>10} {'p95':>10} {'p99':>10}  (ms)"]
+        for name, latency in rows:
+            p50, p95, p99 = latency.percentiles(50, 95, 99)
+            lines.append(f"{name:<{width}} {latency.count:>8} {latency.total / latency.count / 1e6:>10.3f} {p50 / 1e6:>10.3f} {p95 / 1e6:>10.3f} {p99 / 1e6:>10.3f}")
+            if reset:
+                latency.clear()
+        self.echo("\n".join(lines))
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Clears the cached results of a command, or of all commands if no name is given.
+
+        Arguments:
+            name (str, optional): Name of the command, with its groups separated by spaces. Defaults to None.
+
+        Example of use:
+            >>> cli.invalidate("lookup")
+            >>> cli.invalidate("db dump")
+        """
+        if name is not None:
+            cmd, _ = self.__locate(name.split())
+            if "plan" in cmd and cmd["plan"].cache is not None:
+                cmd["plan"].cache.clear()
+            return
+        groups = [self.__root]
+        while groups:
+            for _, cmd in groups.pop().records():
+                if "group" in cmd:
+                    groups.append(cmd["group"])
+                elif "plan" in cmd and cmd["plan"].cache is not None:
+                    cmd["plan"].cache.clear()
+
+    def cache_info(self, name: str) -> Optional[dict]:
+        """Returns the hits, misses and size of the result cache of a command, None if it has no cache.
+
+        Arguments:
+            name (str): Name of the command, with its groups separated by spaces.
+
+        Example of use:
+            >>> cli.cache_info("lookup")
+            {'hits': 12, 'misses': 3, 'size': 3, 'maxsize': 256, 'ttl': 60}
+        """
+        cmd, _ = self.__locate(name.split())
+        if "plan" not in cmd or cmd["plan"].cache is None:
+            return None
+        return cmd["plan"].cache.info()
+
+    @property
+    def loop(self) -> 'AbstractEventLoop':
+        """Returns the event loop on which coroutine commands are run.
+        The loop is started on first use in a background thread and lives as long as the CLI,
+        so tasks created by a command keep running between prompts.
+
+        Example of use:
+            >>> import WizardCLI
+            >>> cli = WizardCLI.CLI()
+            >>> @cli.command()
+            >>> async def ping(host):
+            ...    reader, writer = await asyncio.open_connection(host, 80)
+            ...    writer.close()
+        """
+        if self.__loop is None:
+            from asyncio import new_event_loop
+            self.__loop = new_event_loop()
+            Thread(target=self.__loop_thread, daemon=True).start()
+        return self.__loop
+
+    def __loop_thread(self) -> None:
+        "Runs the event loop of the CLI forever."
+        from asyncio import set_event_loop
+        set_event_loop(self.__loop)
+        self.__loop.run_forever()
+
+    def __await(self, coro: object, timeout: Optional[float] = None) -> any:
+        "Runs a coroutine on the event loop of the CLI and waits for its result, cancelling it on timeout or Ctrl-C."
+        from asyncio import run_coroutine_threadsafe
+        future = run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise Cancelled(f"Timed out after {timeout}s.") from None
+        except BaseException:
+            future.cancel()
+            raise
+
+    @property
+    def token(self) -> 'CancelToken':
+        """Returns the cancellation token of the command running in the current thread.
+        It is cancelled by Ctrl-C, by the timeout of the command or by the cancel built-in for a background job,
+        so that long loops can stop cleanly. Coroutine commands are cancelled with asyncio instead.
+
+        Example of use:
+            >>> @cli.command()
+            >>> def watch(path: str):
+            ...    while not cli.token.wait(1.0):
+            ...        print(ospath.getsize(path))
+        """
+        return _TOKEN.get()
+
+    def dispatch(self, entry: list) -> any:
+        """Resolves the command named by the first token of entry, runs it and returns its result.
+        Raises CommandError when the command or one of its arguments is invalid.
+
+        Arguments:
+            entry (list): Tokens of the command line, as returned by tokenize. Only the unquoted | and & it marks run a pipeline or a background job.
+
+        Example of use:
+            >>> cli.dispatch(["hello_world"])
+        """
+        if len(entry) > 1 and isinstance(entry[-1], _Operator) and entry[-1] == "&":
+            self.__locate(entry[:-1])
+            return self.__submit(entry[:-1])
+        if any(isinstance(i, _Operator) and i == "|" for i in entry):
+            return self.__pipeline(entry)
+        cmd, depth = self.__locate(entry)
+        if "group" in cmd:
+            self.echo(cmd["group"].help(False))
+            return None
+        return self.__consume(self.exec(cmd, entry[depth:] if depth else entry))
+
+    def __consume(self, result: any) -> any:
+        "Displays the items of a command returning an iterator, other results being returned as they are."
+        if isinstance(result, Iterator):
+            for item in result:
+                self.echo(item)
+            return None
+        return result
+
+    def __locate(self, entry: list) -> tuple:
+        "Returns the command named by the first tokens of entry, descending into groups, and the number of tokens naming it minus one."
+        cmd = self.__root.resolve(entry[0])
+        depth = 0
+        while "group" in cmd and depth + 1 < len(entry) and entry[depth + 1][:1] != "-":
+            depth += 1
+            cmd = cmd["group"].resolve(entry[depth])
+        return cmd, depth
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> list:
+        """Returns the sorted names and aliases of commands starting with prefix.
+
+        Arguments:
+            prefix (str): Beginning of the command name.
+            limit (int, optional): Maximum number of results. Defaults to None.
+
+        Example of use:
+            >>> cli.complete("he")
+            ['help']
+        """
+        return self.__root.complete(prefix, limit)
+
+    def suggest(self, name: str, limit: int = 3) -> list:
+        """Returns the names and aliases of commands closest to name, the closest first.
+
+        Arguments:
+            name (str): Mistyped command name.
+            limit (int, optional): Maximum number of suggestions. Defaults to 3.
+
+        Example of use:
+            >>> cli.suggest("hlep")
+            ['help']
+        """
+        return self.__root.suggest(name, limit)
+
+    def __completer(self, text: str, state: int) -> Optional[str]:
+        "Readline completer for command names and the parameters and options of the current command."
+        if state == 0:
+            import readline
+            line = readline.get_line_buffer()[:readline.get_begidx()]
+            tokens = line.split()
+            if "|" in tokens:
+                tokens = tokens[len(tokens) - tokens[::-1].index("|"):]
+            group, cmd = self.__root, {}
+            for token in tokens:
+                cmd = group.get(token) or {}
+                if "group" not in cmd:
+                    break
+                group = cmd["group"]
+            if not tokens or "group" in cmd:
+                self.__matches = group.complete(text)
+            else:
+                flags = cmd["plan"].flags if "plan" in cmd else {}
+                self.__matches = sorted(i for i in flags if i.startswith(text))
+        if state < len(self.__matches):
+            return self.__matches[state] + " "
+        return None
+
+    def __pipeline(self, entry: list) -> any:
+        "Runs commands separated by | where each one reads the items produced by the previous one."
+        stages, start = [], 0
+        for index, token in enumerate(entry):
+            if isinstance(token, _Operator) and token == "|":
+                stages.append(entry[start:index])
+                start = index + 1
+        stages.append(entry[start:])
+        cmds = []
+        for index, stage in enumerate(stages):
+            if not stage:
+                raise CommandError("Empty command in pipeline.")
+            cmd, depth = self.__locate(stage)
+            if "group" in cmd:
+                raise CommandError(f"{' '.join(stage[:depth + 1])} needs a command.")
+            if index and cmd["plan"].pipe is None:
+                raise CommandError(f"{' '.join(stage[:depth + 1])} cannot read from a pipe.")
+            cmds.append(cmd)
+            stages[index] = stage[depth:]
+        pipes = []
+        try:
+            result = self.exec(cmds[0], stages[0])
+            for cmd, stage in zip(cmds[1:], stages[1:]):
+                pipes.append(_Pipe(result, self.__pipe_buffer, flush=self.__out.flush))
+                result = self.exec(cmd, stage, iter(pipes[-1]))
+            return self.__consume(result)
+        finally:
+            for pipe in pipes:
+                pipe.close()
+
+    def __submit(self, entry: list) -> 'Job':
+        "Runs a command line as a background job in the thread pool of the CLI."
+        if self.__pool is None:
+            self.__pool = ThreadPoolExecutor(max_workers=self.__workers, thread_name_prefix="WizardCLI-job")
+            self.__redirect()
+        self.__job_id += 1
+        job = Job(self.__job_id, " ".join(i if isinstance(i, _Operator) else quote(i) for i in entry))
+        self.__jobs[job.id] = job
+        job.future = self.__pool.submit(self.__job, job, entry)
+        self.echo(f"[{job.id}] {job.line}")
+        return job
+
+    def __redirect(self) -> None:
+        "Replaces the standard output by a proxy letting pool threads capture what they print."
+        if self.__capture is None:
+            self.__capture = _Capture(sys.stdout)
+            sys.stdout = self.__capture
+
+    def __job(self, job: 'Job', entry: list) -> any:
+        "Runs a background job, capturing what it prints."
+        self.__capture.buffers[get_ident()] = job.output
+        reset = _TOKEN.set(job.token)
+        job.thread = get_ident()
+        try:
+            return self.dispatch(entry)
+        finally:
+            with job.lock:
+                job.thread = None
+            _TOKEN.reset(reset)
+            self.__out.flush()
+            del self.__capture.buffers[get_ident()]
+
+    def __get_job(self, job: int) -> 'Job':
+        "Returns the background job with the given id."
+        if job not in self.__jobs:
+            raise CommandError(f"No job {job}.")
+        return self.__jobs[job]
+
+    def jobs(self) -> None:
+        "Lists the background jobs started with a trailing &."
+        for job in self.__jobs.values():
+            self.echo(f"[{job.id}] {job.status:<9} {job.line}")
+
+    def wait(self, job: Optional[int] = None) -> None:
+        "Waits for a background job to finish, or for all of them if no job is given."
+        jobs = [self.__get_job(job)] if job is not None else list(self.__jobs.values())
+        waitF([i.future for i in jobs])
+        for i in jobs:
+            self.echo(f"[{i.id}] {i.status:<9} {i.line}")
+
+    def fg(self, job: int) -> any:
+        "Waits for a background job, displays its output and removes it from the jobs list."
+        job = self.__get_job(job)
+        waitF([job.future])
+        del self.__jobs[job.id]
+        output = job.output.getvalue()
+        if output:
+            self.__out.flush()
+            sys.stdout.write(output)
+        if job.future.cancelled() or isinstance(job.future.exception(), Cancelled):
+            self.echo(f"[{job.id}] cancelled")
+        elif job.future.exception() is not None:
+            self.echo(f"[{job.id}] failed: {job.future.exception()}")
+        else:
+            return job.future.result()
+
+    def cancel(self, job: int) -> None:
+        "Cancels a background job, a running one through its cancellation token."
+        job = self.__get_job(job)
+        if job.future.cancel():
+            self.echo(f"[{job.id}] cancelled")
+            return
+        if job.thread is None:
+            self.echo(f"[{job.id}] is {job.status} and cannot be cancelled")
+            return
+        job.token.cancel()
+        Timer(_GRACE, self.__interrupt, (job,)).start()
+        self.echo(f"[{job.id}] cancelling")
+
+    def __interrupt(self, job: 'Job') -> None:
+        "Raises Cancelled in a background job still running after the grace period of its cancellation."
+        with job.lock:
+            if job.thread is not None:
+                _interrupt(job.thread)
+
+    def run(self) -> None:
+        "This method of the CLI object allows you to launch the CLI after you have created all your commands."
+        self.__setup()
+        if not stdin.isatty():
+            self.run_script(stdin, summary=False)
+            return
+        try:
+            import readline
+            readline.set_completer(self.__completer)
+            readline.set_completer_delims(" \t")
+            readline.parse_and_bind("tab: complete")
+        except ImportError:
+            readline = None
+        history, seeded = self.__history, True
+        if history is not None:
+            history.load()
+            seeded = readline is None
+        self.__prompt.start()
+        duration = ""
+        while True:
+            running = False
+            try:
+                self.__out.flush()
+                if not seeded and history.ready:
+                    for _, line in history.tail(1000):
+                        readline.add_history(line)
+                    seeded = True
+                line = input(self.__prompt.render(self.user, self.__path, duration))
+                if history is not None and line.strip():
+                    if line[0] == "!":
+                        line = self.__recall(line[1:])
+                        self.echo(line)
+                    history.append(line)
+                entry = tokenize(line)
+                if not entry:
+                    continue
+                token, running = CancelToken(), True
+                reset = _TOKEN.set(token)
+                start = perf_counter_ns()
+                try:
+                    self.dispatch(entry)
+                except KeyboardInterrupt:
+                    token.cancel()
+                    raise
+                finally:
+                    duration = _Prompt.duration(perf_counter_ns() - start)
+                    _TOKEN.reset(reset)
+            except KeyboardInterrupt:
+                self.__out.flush()
+                self.echo("Cancelled." if running else "")
+            except EOFError:
+                self.__out.flush()
+                self.leave()
+            except (CommandError, Cancelled) as e:
+                self.echo(str(e))
+            except Exception as e:
+                self.echo(f"An unexpected error occurred: {e}")
+
+    def __recall(self, ref: str) -> str:
+        "Returns the command line of the history referred by !!, !number, !-number or !prefix."
+        history = self.__history
+        if ref == "!":
+            ref = "-1"
+        try:
+            number = int(ref)
+        except ValueError:
+            for _, line in history.search(ref, True):
+                return line
+            raise CommandError(f"{ref}: event not found.")
+        index = number - 1 if number > 0 else len(history) + number
+        if not 0 <= index < len(history) or number == 0:
+            raise CommandError(f"{ref}: event not found.")
+        return history[index]
+
+    def serve(self, path: Union[str, PathLike]) -> None:
+        """Keeps the CLI running as a server on a Unix socket, so that command lines sent by
+        WizardCLI/client.py are run by this warm process instead of starting a new interpreter.
+        Each connection runs one command line like CLI.main, in a pool of workers threads,
+        and its output is streamed back to the client followed by the exit code.
+        Stops on KeyboardInterrupt with CLI.shutdown. Only available where asyncio supports Unix sockets.
+
+        Arguments:
+            path (str | PathLike): Path of the socket, a stale socket file is replaced.
+
+        Example of use:
+            >>> import WizardCLI
+            >>> cli = WizardCLI.CLI()
+            >>> @cli.command()
+            >>> def hello_world():
+            ...    print("Hello World")
+            >>> cli.serve("/tmp/hello.sock")
+            # python WizardCLI/client.py /tmp/hello.sock hello_world
+        """
+        from asyncio import new_event_loop, start_unix_server
+        path = ospath.expanduser(path)
+        if ospath.exists(path) and S_ISSOCK(stat(path).st_mode):
+            remove(path)
+        self.__redirect()
+        executor = ThreadPoolExecutor(max_workers=self.__workers, thread_name_prefix="WizardCLI-serve")
+        loop = new_event_loop()
+        server = loop.run_until_complete(start_unix_server(partial(self.__client, executor), path, limit=1 << 24))
+        try:
+            loop.run_until_complete(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+            executor.shutdown(wait=False)
+            if ospath.exists(path):
+                remove(path)
+            self.shutdown()
+
+    async def __client(self, executor: ThreadPoolExecutor, reader: 'StreamReader', writer: 'StreamWriter') -> None:
+        "Runs the command line sent by a client of serve and sends back its output and exit code."
+        from asyncio import get_running_loop, wait, FIRST_COMPLETED
+        loop = get_running_loop()
+        try:
+            argv = loads(await reader.readline())
+            if not isinstance(argv, list):
+                raise ValueError("expected a list of arguments")
+            stream = _Remote(loop, writer)
+            command = loop.run_in_executor(executor, self.__remote, [str(i) for i in argv], stream)
+            hangup = loop.create_task(_Remote.closed(reader))
+            await wait((command, hangup), return_when=FIRST_COMPLETED)
+            if not command.done():
+                stream.token.cancel("Client disconnected.")
+                Timer(_GRACE, self.__hangup, (stream,)).start()
+                await command
+                return
+            hangup.cancel()
+            writer.write(_Remote.frame(b"x", str(command.result()).encode()))
+            await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def __remote(self, argv: list, stream: '_Remote') -> int:
+        "Runs a command line of a client of serve in a worker thread, sending what it displays to the client."
+        self.__capture.buffers[get_ident()] = stream
+        stream.thread = get_ident()
+        try:
+            return self.__main(argv, stream.token)
+        finally:
+            self.__out.flush()
+            stream.flush()
+            with stream.lock:
+                stream.thread = None
+            del self.__capture.buffers[get_ident()]
+
+    def __hangup(self, stream: '_Remote') -> None:
+        "Raises Cancelled in a command of a disconnected client still running after the grace period."
+        with stream.lock:
+            if stream.thread is not None:
+                _interrupt(stream.thread)
+
+    def run_script(self,
+                   source: Union[str, PathLike, object, None] = None,
+                   summary: bool = True,
+                   stop_on_error: bool = False
+                   ) -> dict:
+        """Executes commands from a script without rendering the prompt.
+
+        Blank lines and lines starting with "#" are ignored.
+
+        Arguments:
+            source (str | PathLike | file | iterable, optional): Path of the script, file object or iterable of lines. Defaults to stdin, read in bulk when it is not a TTY.
+            summary (bool, optional): Print the summary once the script is done. Defaults to True.
+            stop_on_error (bool, optional): Stop at the first failing command. Defaults to False.
+
+        Return:
+            dict: Number of commands run, failures, total and average latency in nanoseconds.
+
+        Example of use:
+            >>> import WizardCLI
+            >>> cli = WizardCLI.CLI()
+            >>> cli.run_script("commands.txt")
+        """
+        self.__setup()
+        if source is None:
+            source = stdin
+        if isinstance(source, (str, PathLike)):
+            with open(source, encoding="UTF-8") as f:
+                return self.run_script(f, summary, stop_on_error)
+        if source is stdin and not stdin.isatty():
+            source = stdin.read().splitlines()
+        commands = failures = total = 0
+        for number, line in enumerate(source, 1):
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            commands += 1
+            start = perf_counter_ns()
+            try:
+                self.dispatch(tokenize(line))
+            except Exception as e:
+                failures += 1
+                self.echo(f"Line {number}: {e}")
+                if stop_on_error:
+                    break
+            finally:
+                total += perf_counter_ns() - start
+                self.__out.done()
+        report = {
+            "commands": commands,
+            "failures": failures,
+            "total": total,
+            "average": total / commands if commands else 0
+        }
+        if summary:
+            self.echo(
+                f"{commands} command(s) run, {failures} failure(s), "
+                f"total {total / 1e6:.3f} ms, average {report['average'] / 1e3:.3f} us"
+            )
+        self.__out.flush()
+        return report
+
+    def main(self, argv: Optional[list] = None) -> int:
+        """Runs a single command from the command line arguments and returns an exit code.
+        The built-in commands of the interactive CLI are not registered.
+
+        Arguments:
+            argv (list, optional): Command name followed by its arguments. Defaults to sys.argv[1:].
+
+        Return:
+            int: 0 on success, 1 if the command raised an error, 2 if the command line is invalid, 130 if it was cancelled.
+
+        Example of use:
+            >>> import WizardCLI
+            >>> cli = WizardCLI.CLI()
+            >>> @cli.command()
+            >>> def hello_world():
+            ...    print("Hello World")
+            >>> raise SystemExit(cli.main())
+        """
+        if argv is None:
+            argv = sysargv[1:]
+        return self.__main(argv, CancelToken())
+
+    def __main(self, argv: list, token: 'CancelToken') -> int:
+        "Runs a single command with the given cancellation token and returns its exit code, see CLI.main."
+        if not argv:
+            self.echo("No command provided.")
+            self.__out.flush()
+            return 2
+        reset = _TOKEN.set(token)
+        try:
+            self.dispatch(list(argv))
+        except CommandError as e:
+            self.echo(str(e))
+            return 2
+        except KeyboardInterrupt:
+            token.cancel()
+            return 130
+        except Cancelled as e:
+            self.echo(str(e))
+            return 130
+        except Exception as e:
+            self.echo(f"An unexpected error occurred: {e}")
+            return 1
+        finally:
+            _TOKEN.reset(reset)
+            self.__out.flush()
+        return 0
+
+
+class Group:
+    __slots__ = ('__path', '__cmd', '__trie', '__similar', '__help', '__abbrev', '__target', '__loading', '__lock')
+    def __init__(self, path: str = "", target: Optional[str] = None, abbrev: bool = True) -> None:
+        """Registry of commands of a CLI or of one of its groups of subcommands.
+        Groups are created with CLI.group or Group.group.
+
+        Arguments:
+            path (str, optional): Names leading to the group, separated by spaces. Defaults to "" for the CLI itself.
+            target (str, optional): Import path of a function registering the commands of the group, called on first use. Defaults to None.
+            abbrev (bool, optional): Allow commands to be called by a unique prefix of their name or alias. Defaults to True.
+        """
+        self.__path = path
+        self.__cmd = {}
+        self.__trie = _Trie()
+        self.__similar = _Trigrams()
+        self.__help = _HelpTable()
+        self.__abbrev = abbrev
+        self.__target = target
+        self.__loading = False
+        self.__lock = RLock()
+
+    @property
+    def path(self) -> str:
+        """Returns the names leading to the group."""
+        return self.__path
+
+    def command(self,
+                name: Optional[str] = None,
+                doc: Optional[str] = None,
+                alias : list = [],
+                pipe: Optional[str] = None,
+                cache: Optional['CachePolicy'] = None,
+                parallel: Optional[str] = None,
+                pool: str = "threads",
+                timeout: Optional[float] = None
+                ) -> callable:
+        """The command decorator allows you to define a function as a command of the group.
+
+        Arguments:
+            name (str, optional): Name of the command. Defaults to function name.
+            doc (str, optional): Documentation for the command. Defaults to function docstring.
+            alias (list): List of alternative names for the command. Defaults to [].
+            pipe (str, optional): Parameter receiving the items produced by the previous command of a pipeline. Defaults to None.
+            cache (CachePolicy, optional): Cache the results of the command by arguments. Defaults to None.
+            parallel (str, optional): Argument taking any number of values, the command being called once per value in a pool. Defaults to None.
+            pool (str, optional): Pool of the parallel calls: "threads" or "processes", the function must then be importable. Defaults to "threads".
+            timeout (float, optional): Seconds after which the command is cancelled, see CLI.token. Defaults to None.
+
+        Return:
+            Callable: Decorated function that becomes a CLI command.
+
+        Example of use:
+            >>> db = cli.group("db")
+            >>> @db.command()
+            >>> def migrate(version: int):
+            ...    print("Migrating to", version)
+        """
+        if pool not in ("threads", "processes"):
+            raise ValueError(f"Invalid pool: {pool}, expected 'threads' or 'processes'")
+        def decorator(func: callable) -> callable:
+            def wrapper(name: str, doc: str, alias: list) -> None:
+                if doc is None:
+                    doc = ""
+                data = {"function": func}
+                args_info = signature(func).parameters.items()
+                args, options, params = [], [], {}
+                for arg_name, arg_info in args_info:
+                    if arg_name == pipe:
+                        data["pipe"] = pipe
+                    elif arg_name == parallel:
+                        args.append((f"[{arg_name}...]", arg_info.annotation))
+                    elif arg_info.default == Signature.empty:
+                        args.append((f"[{arg_name}]", arg_info.annotation))
+                    elif arg_info.default is True:
+                        options.append(f"-{arg_name}")
+                    else:
+                        params[f"--{arg_name}"] = (arg_info.annotation, arg_info.default)
+                if doc != "":
+                    data["doc"] = doc
+                if args != []:
+                    data["args"] = args
+                if options != []:
+                    data["options"] = options
+                if params != {}:
+                    data["params"] = params
+                if alias != []:
+                    data["alias"] = [i.lower() for i in alias]
+                name = name.replace(" ", "_").lower()
+                data["info"] = self.__info(f"{self.__path} {name}".lstrip(), data)
+                data["plan"] = self.__compile(func, pipe, cache, parallel, pool, timeout)
+                self.__register(name, data)
+            wrapper(name=name if name else func.__name__, doc=doc if doc else func.__doc__, alias=alias)
+            return func
+        return decorator
+
+    def lazy_command(self,
+                     target: str,
+                     name: Optional[str] = None,
+                     doc: Optional[str] = None,
+                     alias: list = [],
+                     **options: any
+                     ) -> None:
+        """Registers a command of the group without importing the module that defines it, see CLI.lazy_command."""
+        module, sep, attr = target.partition(":")
+        if not sep or not module or not attr:
+            raise ValueError(f"Invalid import path: {target}, expected 'package.module:function'")
+        name = (name if name else attr.rsplit(".", 1)[-1]).replace(" ", "_").lower()
+        data = {"target": target, "options": options}
+        if doc:
+            data["doc"] = doc
+        if alias != []:
+            data["alias"] = [i.lower() for i in alias]
+        self.__register(name, data)
+
+    def __load(self, name: str, cmd: dict) -> dict:
+        "Imports the function of a lazy command and registers it in place of the lazy record."
+        module, _, attr = cmd["target"].partition(":")
+        func = import_module(module)
+        for part in attr.split("."):
+            func = getattr(func, part)
+        self.command(name=name, doc=cmd.get("doc"), alias=cmd.get("alias", []), **cmd["options"])(func)
+        return self.__cmd[name]
+
+    def group(self,
+              name: str,
+              doc: Optional[str] = None,
+              alias: list = [],
+              target: Optional[str] = None
+              ) -> 'Group':
+        """Creates a group of subcommands inside the group, see CLI.group."""
+        if target is not None and ":" not in target:
+            raise ValueError(f"Invalid import path: {target}, expected 'package.module:function'")
+        name = name.replace(" ", "_").lower()
+        group = Group(f"{self.__path} {name}".lstrip(), target, self.__abbrev)
+        data = {"group": group}
+        if doc:
+            data["doc"] = doc
+        if alias != []:
+            data["alias"] = [i.lower() for i in alias]
+        self.__register(name, data)
+        return group
+
+    def __register(self, name: str, data: dict) -> None:
+        "Adds a command record under its name and aliases to the registry and its indexes."
+        self.__cmd[name] = data
+        self.__help.add(name, self.__format(name, data))
+        self.__trie.insert(name, name)
+        self.__similar.add(name)
+        for i in data.get("alias", []):
+            self.__cmd[i] = name
+            self.__trie.insert(i, name)
+            self.__similar.add(i)
+
+    def unregister(self, name: str) -> None:
+        """Removes a command and its aliases from the group."""
+        cmd = self.__cmd.pop(name, None)
+        if not isinstance(cmd, dict):
+            return
+        self.__help.remove(name)
+        for key in [name] + cmd.get("alias", []):
+            if key != name:
+                self.__cmd.pop(key, None)
+            self.__trie.remove(key)
+            self.__similar.remove(key)
+
+    def __ensure(self) -> None:
+        "Imports the module registering the commands of a lazy group."
+        if self.__target is None:
+            return
+        with self.__lock:
+            if self.__target is None or self.__loading:
+                return
+            self.__loading = True
+            try:
+                module, _, attr = self.__target.partition(":")
+                func = import_module(module)
+                for part in attr.split("."):
+                    func = getattr(func, part)
+                func(self)
+                self.__target = None
+            finally:
+                self.__loading = False
+
+    def records(self) -> Iterator:
+        """Yields the names and records of the commands and groups of the group, without their aliases."""
+        for name, cmd in list(self.__cmd.items()):
+            if isinstance(cmd, dict):
+                yield name, cmd
+
+    def get(self, name: str) -> Optional[dict]:
+        """Returns the record of the command registered under name or alias, without importing anything."""
+        cmd = self.__cmd.get(name.lower())
+        if isinstance(cmd, str):
+            cmd = self.__cmd[cmd]
+        return cmd
+
+    def resolve(self, name: str) -> dict:
+        """Returns the record of the command registered under name, alias or a unique prefix of them.
+        Raises CommandError if there is none."""
+        self.__ensure()
+        cmd = self.__cmd.get(name.lower())
+        if cmd is None:
+            target = self.__trie.unique(name.lower()) if self.__abbrev else None
+            if target is None:
+                matches = self.__trie.complete(name.lower(), 6) if self.__abbrev else []
+                if len(matches) > 1:
+                    more = ", ..." if len(matches) > 5 else ""
+                    raise CommandError(f"{name} is ambiguous: {', '.join(matches[:5])}{more}")
+                suggestions = self.suggest(name)
+                hint = f"\nDid you mean: {', '.join(suggestions)}?" if suggestions else ""
+                where = f"Do {self.__path} to get the list of its commands." if self.__path else "Do help to get the list of existing commands."
+                raise CommandError(f"{name} doesn't exist.{hint}\n{where}")
+            cmd = target
+        if isinstance(cmd, str):
+            name, cmd = cmd, self.__cmd[cmd]
+        if "target" in cmd:
+            cmd = self.__load(name.lower(), cmd)
+        return cmd
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> list:
+        """Returns the sorted names and aliases of commands starting with prefix.
+
+        Arguments:
+            prefix (str): Beginning of the command name.
+            limit (int, optional): Maximum number of results. Defaults to None.
+
+        Example of use:
+            >>> db.complete("mi")
+            ['migrate']
+        """
+        self.__ensure()
+        return self.__trie.complete(prefix.lower(), limit)
+
+    def suggest(self, name: str, limit: int = 3) -> list:
+        """Returns the names and aliases of commands closest to name, the closest first.
+
+        Arguments:
+            name (str): Mistyped command name.
+            limit (int, optional): Maximum number of suggestions. Defaults to 3.
+
+        Example of use:
+            >>> db.suggest("mirgate")
+            ['migrate']
+        """
+        self.__ensure()
+        return self.__similar.search(name.lower(), limit)
+
+    def help(self, long: bool = True, prefix: str = "", page: int = 0, size: int = 20) -> str:
+        """Returns the help text of the group, only for the commands starting with prefix and on the given page if any."""
+        self.__ensure()
+        return self.__help.render(long, prefix, page, size)
+
+    def __format(self, name: str, cmd: dict) -> tuple:
+        "Format the help line data of command: aliases, usage and documentation."
+        alias = ", ".join(cmd.get("alias", []))
+        local = name if "group" not in cmd else f"{name} <command>"
+        for i in [' '.join(arg[0] for arg in cmd.get("args", [])), ' '.join(cmd.get("params", {}).keys()), ' '.join(cmd.get("options", []))]:
+            if len(i) != 0:
+                local += " " + i
+        return alias, local, cmd.get("doc", "")
+
+    def __compile(self,
+                  func: callable,
+                  pipe: Optional[str] = None,
+                  cache: Optional['CachePolicy'] = None,
+                  parallel: Optional[str] = None,
+                  pool: str = "threads",
+                  timeout: Optional[float] = None
+                  ) -> '_Plan':
+        "Builds the parse plan used by exec to dispatch the command."
+        args, flags, defaults, fanout = [], {}, {}, None
+        for arg_name, arg_info in signature(func).parameters.items():
+            if arg_name == pipe:
+                continue
+            elif arg_name == parallel:
+                fanout = (arg_name, _converter(arg_info.annotation), pool)
+            elif arg_info.default == Signature.empty:
+                args.append((arg_name, _converter(arg_info.annotation)))
+            elif arg_info.default is True:
+                flags[f"-{arg_name}"] = (arg_name, None, False)
+                defaults[arg_name] = False
+            else:
+                flags[f"--{arg_name}"] = (arg_name, _converter(arg_info.annotation), True)
+        if parallel is not None and fanout is None:
+            raise ValueError(f"{parallel} is not a parameter of {func.__name__}")
+        return _Plan(func, tuple(args), len(args), flags, defaults, pipe,
+                     None if cache is None else _ResultCache(cache), _Latency(), fanout, timeout)
+
+    def __info(self, name: str, data: dict) -> str:
+        "Creates the information message for the commands to add in the cli."
+        usage = f"\nUsage: {name}"
+        txt = ""
+        for i in data:
+            if i == "doc":
+                txt += f"\nDocumentation: {data[i]}"
+            elif i == "args":
+                txt += "\nArgument(s):"
+                for j in data["args"]:
+                    usage += f" {j[0]}"
+                    tp = str(j[1]).replace("<class '", "").replace("'>", "")
+                    txt += f"\n    {j[0].replace('[', '').replace(']', '')}: {tp}"
+            elif i == "params":
+                txt += "\nParameter(s):"
+                for j in data["params"]:
+                    usage += f" {j}"
+                    tpe = str(data['params'][j][0]).replace("<class '", "").replace("'>", "")
+                    if tpe == "None":
+                        tpe = ""
+                    else:
+                        tpe = ": " + tpe
+                    txt += f"\n    {j}{tpe} = {data['params'][j][1]}"
+            elif i == "options":
+                txt += "\nOption(s):"
+                for j in data["options"]:
+                    usage += f" {j}"
+                txt += f" {j}"
+            elif i == "pipe":
+                txt += f"\nInput: {data['pipe']}"
+            elif i == "alias":
+                txt += "\nAlias: "
+                txt += ", ".join(data["alias"])
+        return txt[1:] + usage
+
+
+class Output:
+    __slots__ = ('__format', '__policy', '__threshold', '__idle', '__buffers', '__lock', '__flusher')
+    def __init__(self,
+                 formating: str = "{}",
+                 policy: str = "command",
+                 threshold: int = 65536,
+                 idle: float = 0.1
+                 ) -> None:
+        """Buffered writer used by the CLI to display text.
+        Lines are buffered per thread and written to stdout in one call per flush,
+        the formating of the CLI being applied once to the whole block.
+
+        Flush policies:
+            - "command": at the end of each command
+            - "size": only when the buffer reaches the threshold
+            - "idle": when nothing has been written for idle seconds
+        The buffer is always flushed when it reaches the threshold and before the prompt is displayed.
+
+        Arguments:
+            formating (str, optional): Text format applied to the flushed text. Defaults to "{}".
+            policy (str, optional): Flush policy. Defaults to "command".
+            threshold (int, optional): Number of characters buffered before flushing. Defaults to 65536.
+            idle (float, optional): Delay in seconds of the idle policy. Defaults to 0.1.
+        """
+        if policy not in ("command", "size", "idle"):
+            raise ValueError(f"Unknown flush policy: {policy}")
+        self.__format = formating.format
+        self.__policy = policy
+        self.__threshold = threshold
+        self.__idle = idle
+        self.__buffers = {}
+        self.__lock = Lock()
+        self.__flusher = None
+
+    @property
+    def policy(self) -> str:
+        """Returns the flush policy."""
+        return self.__policy
+
+    def write(self, text: str) -> None:
+        """Adds a line to the buffer of the current thread."""
+        block = None
+        with self.__lock:
+            buffer = self.__buffers.get(get_ident())
+            if buffer is None:
+                stream = sys.stdout
+                buffer = self.__buffers[get_ident()] = _Buffer(stream.target() if isinstance(stream, _Capture) else stream)
+            buffer.parts.append(text)
+            buffer.size += len(text)
+            if buffer.size >= self.__threshold:
+                block = self.__take(buffer)
+            elif self.__policy == "idle":
+                buffer.last = perf_counter()
+                if self.__flusher is None:
+                    self.__flusher = Thread(target=self.__idle_flush, daemon=True)
+                    self.__flusher.start()
+        self.__emit(block)
+
+    def __take(self, buffer: '_Buffer') -> Optional[tuple]:
+        "Empties a buffer and returns its stream with the formated text, None if there is nothing to write."
+        if not buffer.parts:
+            return None
+        text = self.__format("\n".join(buffer.parts)) + "\n"
+        buffer.parts = []
+        buffer.size = 0
+        return buffer.stream, text
+
+    @staticmethod
+    def __emit(*blocks: Optional[tuple]) -> None:
+        """Writes blocks taken from the buffers, each in a single call.
+        It is called without the lock, so that a stream blocked by a slow reader only delays its own thread."""
+        for block in blocks:
+            if block is not None:
+                stream, text = block
+                stream.write(text)
+                stream.flush()
+
+    def __idle_flush(self) -> None:
+        "Flushes the buffers which have not been written for the idle delay."
+        while True:
+            sleep(self.__idle)
+            with self.__lock:
+                now = perf_counter()
+                blocks = []
+                for ident, buffer in list(self.__buffers.items()):
+                    if now - buffer.last >= self.__idle:
+                        blocks.append(self.__take(buffer))
+                        del self.__buffers[ident]
+            self.__emit(*blocks)
+
+    def done(self) -> None:
+        """Signals the end of a command, flushing the buffer with the command policy."""
+        if self.__policy == "command":
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffer of the current thread."""
+        with self.__lock:
+            buffer = self.__buffers.pop(get_ident(), None)
+            block = None if buffer is None else self.__take(buffer)
+        self.__emit(block)
+
+    def flush_all(self) -> None:
+        """Writes the buffers of all threads."""
+        with self.__lock:
+            blocks = [self.__take(buffer) for buffer in self.__buffers.values()]
+            self.__buffers.clear()
+        self.__emit(*blocks)
+
+
+class _Buffer:
+    __slots__ = ('stream', 'parts', 'size', 'last')
+    def __init__(self, stream: object) -> None:
+        "Lines waiting to be written by Output for one thread."
+        self.stream = stream
+        self.parts = []
+        self.size = 0
+        self.last = 0.0
+
+
+class Job:
+    __slots__ = ('id', 'line', 'future', 'output', 'token', 'thread', 'lock')
+    def __init__(self, id: int, line: str) -> None:
+        """Background job started by a command line ending with &.
+
+        Arguments:
+            id (int): Number of the job in the CLI.
+            line (str): Command line run by the job.
+        """
+        self.id = id
+        self.line = line
+        self.future: Optional[Future] = None
+        self.output = StringIO()
+        self.token = CancelToken()
+        self.thread: Optional[int] = None
+        self.lock = Lock()
+
+    @property
+    def status(self) -> str:
+        """Returns the state of the job: pending, running, done, failed or cancelled."""
+        if self.future.cancelled():
+            return "cancelled"
+        elif self.future.running():
+            return "running"
+        elif not self.future.done():
+            return "pending"
+        elif isinstance(self.future.exception(), Cancelled):
+            return "cancelled"
+        return "failed" if self.future.exception() is not None else "done"
+
+
+class _Capture:
+    __slots__ = ('stream', 'buffers')
+    def __init__(self, stream: object) -> None:
+        "Standard output proxy redirecting writes of background job threads to their own buffer."
+        self.stream = stream
+        self.buffers = {}
+
+    def write(self, data: str) -> int:
+        return self.buffers.get(get_ident(), self.stream).write(data)
+
+    def target(self) -> object:
+        "Returns the stream the current thread writes to."
+        return self.buffers.get(get_ident(), self.stream)
+
+    def flush(self) -> None:
+        self.target().flush()
+
+    def __getattr__(self, attr: str) -> any:
+        return getattr(self.stream, attr)
+
+
+class History:
+    __slots__ = ('__path', '__file', '__index', '__offsets', '__size', '__map', '__lock', '__ready', '__thread')
+    def __init__(self, path: Union[str, PathLike]) -> None:
+        """Command history kept in an append-only file of one line per command,
+        with the offset of every line stored in an index file next to it (path + ".idx").
+        The index is loaded in the background, and searches run over a memory map of the file
+        so they never read the lines one by one.
+
+        Arguments:
+            path (str | PathLike): File of the history, created if it does not exist.
+
+        Example of use:
+            >>> history = WizardCLI.History("~/.mycli_history")
+            >>> history.append("db migrate 3")
+            >>> next(history.search("migrate"))
+            (0, 'db migrate 3')
+        """
+        self.__path = ospath.expanduser(path)
+        self.__file = None
+        self.__index = None
+        self.__offsets = array("Q")
+        self.__size = 0
+        self.__map = None
+        self.__lock = Lock()
+        self.__ready = Event()
+        self.__thread = None
+
+    def load(self) -> None:
+        "Starts loading the history in a background thread."
+        with self.__lock:
+            if self.__thread is None:
+                self.__thread = Thread(target=self.__load, name="WizardCLI-history", daemon=True)
+                self.__thread.start()
+
+    @property
+    def ready(self) -> bool:
+        """Returns True once the history is loaded."""
+        return self.__ready.is_set()
+
+    def __wait(self) -> None:
+        if not self.__ready.is_set():
+            self.load()
+            self.__ready.wait()
+
+    def __load(self) -> None:
+        "Opens the history, checks its index against the file and indexes the lines missing from it."
+        try:
+            file = open(self.__path, "ab+")
+            index = open(self.__path + ".idx", "ab+")
+            self.__flock(index, True)
+            try:
+                offsets, size = self.__sync(file, index)
+            finally:
+                self.__flock(index, False)
+            self.__file, self.__index, self.__offsets, self.__size = file, index, offsets, size
+        finally:
+            self.__ready.set()
+
+    def __sync(self, file: object, index: object, known: Optional[array] = None) -> tuple:
+        """Returns the offsets and size of the file, rewriting the index from its first offset which is not the start
+        of the next line, so an index left behind by a crash or an older version is repaired. Called with the file lock held.
+        The offsets already known by this session are only compared with the index instead of being checked again."""
+        file.seek(0)
+        data = file.read()
+        if data[-1:] not in (b"", b"\n"):
+            file.write(b"\n")
+            file.flush()
+            data += b"\n"
+        offsets = array("Q")
+        count = index.seek(0, 2) // offsets.itemsize
+        index.seek(0)
+        offsets.fromfile(index, count)
+        trusted = 0
+        if known is not None and offsets[:len(known)] == known:
+            trusted = len(known)
+        valid = self.__valid(offsets, data, trusted)
+        del offsets[valid:]
+        offsets.extend(self.__lines(data, data.find(b"\n", offsets[-1]) + 1 if offsets else 0))
+        if valid < count or valid < len(offsets):
+            index.truncate(valid * offsets.itemsize)
+            offsets[valid:].tofile(index)
+            index.flush()
+        return offsets, len(data)
+
+    @staticmethod
+    def __valid(offsets: array, data: bytes, start: int = 0) -> int:
+        "Returns the number of leading offsets of the index which are the starts of the first lines of data, the first start ones being known."
+        size, previous, count = len(data), offsets[start - 1] if start else -1, len(offsets)
+        for i, offset in enumerate(islice(offsets, start, None), start):
+            if offset <= previous or offset >= size or (offset and data[offset - 1] != 10):
+                count = i
+                break
+            previous = offset
+        if count and data.count(b"\n", 0, offsets[count - 1]) != count - 1:
+            return 0
+        return count
+
+    @staticmethod
+    def __lines(data: bytes, start: int) -> array:
+        "Returns the offsets of the lines of data from start, data ending with a newline."
+        offsets = array("Q")
+        while start < len(data):
+            offsets.append(start)
+            start = data.index(b"\n", start) + 1
+        return offsets
+
+    @staticmethod
+    def __flock(file: object, lock: bool) -> None:
+        "Locks or unlocks the history against the other sessions using it, where the system supports it."
+        try:
+            from fcntl import flock, LOCK_EX, LOCK_UN
+        except ImportError:
+            return
+        flock(file.fileno(), LOCK_EX if lock else LOCK_UN)
+
+    def append(self, line: str) -> None:
+        """Adds a command line at the end of the history.
+        The lines appended by other sessions since the last append are indexed first,
+        so sessions sharing the history file keep a consistent index.
+
+        Arguments:
+            line (str): Command line entered by the user.
+        """
+        self.__wait()
+        data = line.replace("\n", " ").encode("UTF-8") + b"\n"
+        with self.__lock:
+            if self.__file is None:
+                return
+            file, index = self.__file, self.__index
+            self.__flock(index, True)
+            try:
+                entries = len(self.__offsets)
+                if os.fstat(file.fileno()).st_size != self.__size or os.fstat(index.fileno()).st_size != entries * self.__offsets.itemsize:
+                    self.__offsets, self.__size = self.__sync(file, index, self.__offsets)
+                    self.__map = None
+                file.write(data)
+                file.flush()
+                self.__offsets.append(self.__size)
+                self.__offsets[-1:].tofile(index)
+                index.flush()
+                self.__size += len(data)
+            finally:
+                self.__flock(index, False)
+
+    def __len__(self) -> int:
+        self.__wait()
+        return len(self.__offsets)
+
+    def __view(self) -> Optional[mmap]:
+        "Returns a memory map of the file covering all the lines indexed."
+        with self.__lock:
+            if self.__file is None:
+                return None
+            if self.__map is None or len(self.__map) < self.__size:
+                self.__map = mmap(self.__file.fileno(), 0, access=ACCESS_READ) if self.__size else None
+            return self.__map
+
+    def __getitem__(self, index: int) -> str:
+        self.__wait()
+        offsets = self.__offsets
+        if index < 0:
+            index += len(offsets)
+        if not 0 <= index < len(offsets):
+            raise IndexError("history index out of range")
+        end = offsets[index + 1] if index + 1 < len(offsets) else self.__size
+        return self.__view()[offsets[index]:end - 1].decode("UTF-8", "replace")
+
+    def tail(self, count: int) -> list:
+        """Returns the index and command line of the last entries of the history, oldest first.
+
+        Arguments:
+            count (int): Number of entries.
+        """
+        length = len(self)
+        return [(i, self[i]) for i in range(max(0, length - count), length)]
+
+    def search(self, text: str, prefix: bool = False, before: Optional[int] = None) -> Iterator:
+        """Yields the index and command line of the entries containing text, the most recent first.
+
+        Arguments:
+            text (str): Text to search.
+            prefix (bool, optional): Only yield the entries starting with text. Defaults to False.
+            before (int, optional): Only search the entries before this index, to continue a reverse search. Defaults to None.
+
+        Example of use:
+            >>> for index, line in cli.history.search("deploy", prefix=True):
+            ...    print(index, line)
+        """
+        self.__wait()
+        view, offsets = self.__view(), self.__offsets
+        if view is None or "\n" in text:
+            return
+        needle = (b"\n" if prefix else b"") + text.encode("UTF-8")
+        if before is None or before >= len(offsets):
+            before = len(offsets)
+        end = offsets[before] if before < len(offsets) else self.__size
+        if prefix:
+            end += len(needle) - 2
+        while True:
+            found = view.rfind(needle, 0, end)
+            if found == -1:
+                break
+            index = bisect_right(offsets, found + prefix) - 1
+            yield index, self[index]
+            end = offsets[index] + (len(needle) - 2 if prefix else 0)
+        if prefix and before > 0 and view[:len(needle) - 1] == needle[1:]:
+            yield 0, self[0]
+
+    def close(self) -> None:
+        "Closes the files of the history."
+        if self.__thread is None:
+            return
+        self.__wait()
+        with self.__lock:
+            if self.__file is not None:
+                self.__map = None
+                self.__file.close()
+                self.__index.close()
+                self.__file = self.__index = None
+
+
+class _Remote:
+    __slots__ = ('loop', 'writer', 'token', 'thread', 'lock', '__parts', '__size', '__pending', '__io')
+    def __init__(self, loop: 'AbstractEventLoop', writer: 'StreamWriter') -> None:
+        """Output stream of a command run by serve, writing frames to the client from a worker thread.
+        Writes are batched into one frame per flush, per 64 KiB of text or at most 50 ms after they are made,
+        and the worker waits for the client to read once the buffer of the connection is full,
+        so a slow client slows the command down instead of growing the memory of the server."""
+        self.loop = loop
+        self.writer = writer
+        self.token = CancelToken()
+        self.thread = None
+        self.lock = Lock()
+        self.__parts = []
+        self.__size = 0
+        self.__pending = False
+        self.__io = Lock()
+
+    @staticmethod
+    def frame(kind: bytes, data: bytes) -> bytes:
+        "Returns a frame of the protocol of serve: kind, length of the data as 4 bytes, data."
+        return pack("!cI", kind, len(data)) + data
+
+    def write(self, data: str) -> int:
+        with self.__io:
+            self.__parts.append(data)
+            self.__size += len(data)
+            full = self.__size >= 65536
+            if not full and not self.__pending:
+                self.__pending = True
+                self.loop.call_soon_threadsafe(self.loop.call_later, 0.05, self.__tick)
+        if full or self.__stalled():
+            self.flush()
+        return len(data)
+
+    def __take(self) -> bytes:
+        "Empties the batch, called with the lock held."
+        data = "".join(self.__parts).encode("UTF-8")
+        self.__parts, self.__size = [], 0
+        return data
+
+    def __stalled(self) -> bool:
+        "Checks if the buffer of the connection is above its high-water mark."
+        transport = self.writer.transport
+        return transport.get_write_buffer_size() > transport.get_write_buffer_limits()[1]
+
+    def __tick(self) -> None:
+        "Sends the batch from the event loop 50 ms after its first write, so a command that then works for a while still streams."
+        with self.__io:
+            self.__pending = False
+            data = self.__take()
+        if data and not self.token.cancelled and not self.writer.is_closing():
+            self.writer.write(self.frame(b"o", data))
+
+    def flush(self) -> None:
+        "Sends the buffered text in one frame and waits until the connection accepts more."
+        with self.__io:
+            data = self.__take()
+        if self.token.cancelled:
+            return
+        from asyncio import run_coroutine_threadsafe
+        try:
+            run_coroutine_threadsafe(self.__send(data), self.loop).result()
+        except ConnectionError:
+            self.token.cancel("Client disconnected.")
+
+    @staticmethod
+    async def closed(reader: 'StreamReader') -> None:
+        "Waits until the client closes the connection, which it never writes to after the command line."
+        try:
+            await reader.read()
+        except ConnectionError:
+            pass
+
+    async def __send(self, data: bytes) -> None:
+        "Writes a frame on the event loop, waiting only when the buffer of the connection is above its high-water mark."
+        if data:
+            self.writer.write(self.frame(b"o", data))
+        await self.writer.drain()
+
+
+class CommandError(Exception):
+    "Raised when a command line entered by the user cannot be dispatched."
+
+
+class Cancelled(Exception):
+    "Raised in a command cancelled by Ctrl-C, its timeout or CancelToken.check."
+
+
+class CancelToken:
+    __slots__ = ('__event', 'reason')
+    def __init__(self) -> None:
+        """Cancellation token of a running command, returned by CLI.token.
+        Long loops poll it to stop cleanly when the command is cancelled."""
+        self.__event = Event()
+        self.reason = None
+
+    @property
+    def cancelled(self) -> bool:
+        """Returns True once the command is cancelled."""
+        return self.__event.is_set()
+
+    def cancel(self, reason: str = "Cancelled.") -> None:
+        """Cancels the command."""
+        if not self.__event.is_set():
+            self.reason = reason
+            self.__event.set()
+
+    def check(self) -> None:
+        """Raises Cancelled if the command is cancelled."""
+        if self.__event.is_set():
+            raise Cancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleeps until the command is cancelled or the timeout expires, returns True if it is cancelled."""
+        return self.__event.wait(timeout)
+
+
+class _Idle(CancelToken):
+    __slots__ = ()
+    def cancel(self, reason: str = "Cancelled.") -> None:
+        "Ignored: the token seen outside of any command is shared and must never be cancelled."
+
+
+_TOKEN = ContextVar("WizardCLI_token", default=_Idle())
+_GRACE = 0.5
+
+def _interrupt(ident: int) -> None:
+    "Raises Cancelled in a thread at its next Python instruction, like Ctrl-C does in the main thread."
+    try:
+        from ctypes import pythonapi, c_ulong, py_object
+    except ImportError:
+        return
+    pythonapi.PyThreadState_SetAsyncExc(c_ulong(ident), py_object(Cancelled))
+
+
+class ParallelError(Exception):
+    def __init__(self, errors: list, results: list) -> None:
+        """Raised when calls of a parallel command fail, once all the calls are done.
+
+        Arguments:
+            errors (list): Value and exception of each failed call, in the order of the values.
+            results (list): Results of all the calls in the order of the values, None for the failed ones.
+        """
+        super().__init__(f"{len(errors)} of {len(results)} call(s) failed:"
+                         + "".join(f"\n    {value}: {error}" for value, error in errors))
+        self.errors = errors
+        self.results = results
+
+
+class _Prompt:
+    __slots__ = ('__template', '__parts', '__segments')
+    def __init__(self, template: str) -> None:
+        """Prompt of the CLI, parsed once into literal texts and fields.
+        Dynamic segments are refreshed by their own background thread and rendered from their last value."""
+        self.__template = template
+        self.__parts = None
+        self.__segments = {}
+
+    def segment(self, name: str, interval: float = 1.0) -> callable:
+        "Decorator registering the function computing a dynamic segment, see CLI.segment."
+        def decorator(func: callable) -> callable:
+            self.__segments[name] = _Segment(func, interval)
+            self.__parts = None
+            return func
+        return decorator
+
+    def __compile(self) -> list:
+        "Parses the template into (literal, field, segment, conversion, format spec) parts."
+        parts, auto = [], 0
+        for literal, field, spec, conversion in Formatter().parse(self.__template):
+            segment = None
+            if field is not None:
+                if field == "":
+                    field, auto = str(auto), auto + 1
+                field = {"0": "user", "1": "path"}.get(field, field)
+                if field not in ("user", "path", "duration"):
+                    segment = self.__segments.get(field)
+                    if segment is None:
+                        raise ValueError(f"Unknown prompt segment: {field}")
+            parts.append((literal, field, segment, conversion, spec))
+        return parts
+
+    def start(self) -> None:
+        "Compiles the template and starts the segments it uses, waiting briefly for their first value."
+        if self.__parts is None:
+            self.__parts = self.__compile()
+        segments = [i[2] for i in self.__parts if i[2] is not None]
+        for segment in segments:
+            segment.start()
+        deadline = monotonic() + 0.05
+        for segment in segments:
+            segment.ready.wait(max(0, deadline - monotonic()))
+
+    def render(self, user: str, path: str, duration: str) -> str:
+        "Returns the text of the prompt."
+        if self.__parts is None:
+            self.start()
+        text = []
+        for literal, field, segment, conversion, spec in self.__parts:
+            text.append(literal)
+            if field is None:
+                continue
+            if segment is not None:
+                value = segment.value
+            else:
+                value = user if field == "user" else path if field == "path" else duration
+            if conversion:
+                value = repr(value) if conversion == "r" else ascii(value) if conversion == "a" else str(value)
+            text.append(format(value, spec) if spec else str(value))
+        return "".join(text)
+
+    @staticmethod
+    def duration(ns: int) -> str:
+        "Formats the duration of a command for the {duration} field."
+        if ns < 1_000_000_000:
+            return f"{ns / 1e6:.0f}ms"
+        return f"{ns / 1e9:.1f}s"
+
+
+class _Segment:
+    __slots__ = ('function', 'interval', 'value', 'ready', 'thread')
+    def __init__(self, function: callable, interval: float) -> None:
+        "Dynamic segment of the prompt, computed every interval seconds in a daemon thread."
+        self.function = function
+        self.interval = interval
+        self.value = ""
+        self.ready = Event()
+        self.thread = None
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = Thread(target=self.__refresh, name="WizardCLI-prompt", daemon=True)
+            self.thread.start()
+
+    def __refresh(self) -> None:
+        while True:
+            try:
+                self.value = str(self.function())
+            except Exception:
+                self.value = ""
+            self.ready.set()
+            sleep(self.interval)
 
-    def allow(self, cmd: str, active: bool = True) -> None:
-        """Enable or disable built-in CLI commands.
 
-        Available commands that can be controlled:
-            - "help": Show available commands and their usage
-            - "leave": Exit the CLI
-            - "clear_host": Clear the terminal screen
-            - "change_directory": Change current working directory
-        Default commandes are enable.
+class _Trie:
+    __slots__ = ('children', 'count', 'target', 'value')
+    def __init__(self) -> None:
+        """Prefix tree of the command names and aliases.
+        Each node knows how many entries are below it and, when they all lead to the same command, which one,
+        so unique prefixes are resolved in O(k) for a prefix of k characters."""
+        self.children = {}
+        self.count = 0
+        self.target = None
+        self.value = None
+
+    def insert(self, key: str, value: str) -> None:
+        "Adds key to the tree, leading to the command value."
+        node, path = self, [self]
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Trie()
+            node = child
+            path.append(node)
+        new = node.value is None
+        node.value = value
+        for node in path:
+            if new:
+                node.count += 1
+            if node.count == 1:
+                node.target = value
+            elif node.target != value:
+                node.target = None
+
+    def remove(self, key: str) -> None:
+        "Removes key from the tree."
+        node, path = self, [self]
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        if node.value is None:
+            return
+        node.value = None
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            node.count -= 1
+            if node.count == 0 and depth:
+                del path[depth - 1].children[key[depth - 1]]
+                continue
+            targets = {child.target for child in node.children.values()}
+            if node.value is not None:
+                targets.add(node.value)
+            node.target = targets.pop() if len(targets) == 1 else None
+
+    def __find(self, prefix: str) -> Optional['_Trie']:
+        node = self
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def unique(self, prefix: str) -> Optional[str]:
+        "Returns the command all the entries starting with prefix lead to, or None."
+        node = self.__find(prefix)
+        return None if node is None else node.target
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> list:
+        "Returns the sorted entries starting with prefix."
+        node = self.__find(prefix)
+        if node is None:
+            return []
+        out, stack = [], [(prefix, node)]
+        while stack and (limit is None or len(out) < limit):
+            key, node = stack.pop()
+            if node.value is not None:
+                out.append(key)
+            stack.extend((key + char, child) for char, child in sorted(node.children.items(), reverse=True))
+        return out
+
+
+_BUILTINS = {
+    "help": ["help"],
+    "leave": ["leave"],
+    "clear_host": ["clear-host"],
+    "change_directory": ["change_directory"],
+    "jobs": ["jobs", "fg", "cancel", "wait"],
+    "stats": ["stats"],
+    "history": ["history"],
+    "view": ["view"]
+}
+
+
+_ANSI = recompile(r"\033\[[0-9;]*m")
+
+def _visible(text: str) -> int:
+    "Returns the length of a text as displayed, without its ANSI escape codes."
+    return len(text) if "\033" not in text else len(_ANSI.sub("", text))
+
+
+class Table:
+    __slots__ = ('__columns', '__minimum', '__sample', '__sep', '__end', '__rule', '__reflow', '__widths')
+    def __init__(self,
+                 columns: Optional[list] = None,
+                 widths: Optional[list] = None,
+                 sample: int = 100,
+                 sep: str = "  ",
+                 end: str = "",
+                 rule: str = "-",
+                 reflow: bool = False
+                 ) -> None:
+        """Table renderer streaming its rows, the widths of the columns being measured on the first rows only,
+        so tables of millions of rows are displayed without being held in memory.
+        Cells containing ANSI escape codes are aligned on their displayed length.
 
         Arguments:
-            cmd (str): Name of the command to enable/disable.
-            active (bool, optional): True to enable the command, False to disable it. Defaults to True.
+            columns (list, optional): Names of the columns displayed as header. Defaults to None.
+            widths (list, optional): Minimum widths of the columns. Defaults to None.
+            sample (int, optional): Number of rows used to measure the widths. Defaults to 100.
+            sep (str, optional): Separator of the cells. Defaults to "  ".
+            end (str, optional): Text ending each line, the last column is only padded if it is not empty. Defaults to "".
+            rule (str, optional): Character of the line under the header, "" for none. Defaults to "-".
+            reflow (bool, optional): Widen the columns and display the header again when a row overflows. Defaults to False.
 
-        Example:
-            >>> cli = WizardCLI.CLI()
-            >>> cli.allow("help", False)  # Disable help command
-            >>> cli.allow("leave", False) # Disable ability to exit
-            >>> cli.allow("clear_host", False) # Disable screen clearing
-            >>> cli.allow("change_directory", False) # Disable cd command
+        Example of use:
+            >>> table = WizardCLI.Table(["id", "square"])
+            >>> table.write((i, i * i) for i in range(1_000_000))
+        """
+        self.__columns = None if columns is None else [str(i) for i in columns]
+        self.__minimum = list(widths) if widths else []
+        self.__sample = sample
+        self.__sep = sep
+        self.__end = end
+        self.__rule = rule
+        self.__reflow = reflow
+        self.__widths = list(self.__minimum)
 
-            # Re-enable a command
-            >>> cli.allow("help", True)
+    @property
+    def widths(self) -> list:
+        """Returns the widths of the columns, measured once the rendering has started."""
+        return self.__widths
+
+    def render(self, rows: Iterable) -> Iterator:
+        """Yields the lines of the table, the header first.
+
+        Arguments:
+            rows (iterable): Rows of the table, each one a sequence of values.
         """
-        if cmd in self.__allow_cmd:
-            self.__allow_cmd[cmd] = active
+        rows = iter(rows)
+        head = [self.__cells(row) for row in islice(rows, self.__sample)]
+        widths = self.__widths = list(self.__minimum)
+        for cells in ([self.__columns] if self.__columns else []) + head:
+            self.__fit(cells, widths)
+        yield from self.__header()
+        for cells in head:
+            yield self.__line(cells)
+        last = 0 if self.__end else 1
+        for row in rows:
+            cells = self.__cells(row)
+            if self.__reflow:
+                lengths = [_visible(i) for i in cells[:len(cells) - last]]
+                if len(lengths) > len(widths) or any(length > width for length, width in zip(lengths, widths)):
+                    self.__fit(cells, widths)
+                    yield from self.__header()
+            yield self.__line(cells)
 
-    def command(self,
-                name: Optional[str] = None,
-                doc: Optional[str] = None,
-                alias : list = []
-                ) -> callable:
-        """The command decorator allows you to define a function as a command for the CLI.
+    def write(self, rows: Iterable, stream: Optional[object] = None, chunk: int = 1000) -> None:
+        """Writes the table to a stream in chunks of lines.
 
         Arguments:
-            name (str, optional): Name of the command. Defaults to function name.
-            doc (str, optional): Documentation for the command. Defaults to function docstring.
-            alias (list): List of alternative names for the command. Defaults to [].
+            rows (iterable): Rows of the table, each one a sequence of values.
+            stream (file, optional): Stream written. Defaults to sys.stdout.
+            chunk (int, optional): Number of lines written at once. Defaults to 1000.
+        """
+        stream = sys.stdout if stream is None else stream
+        lines = []
+        for line in self.render(rows):
+            lines.append(line)
+            if len(lines) >= chunk:
+                stream.write("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            stream.write("\n".join(lines) + "\n")
+        stream.flush()
 
-        Return:
-            Callable: Decorated function that becomes a CLI command.
+    @staticmethod
+    def __cells(row: any) -> list:
+        return ["" if i is None else str(i) for i in row]
+
+    @staticmethod
+    def __fit(cells: list, widths: list) -> None:
+        "Widens the columns to the cells of a row."
+        for i, cell in enumerate(cells):
+            length = _visible(cell)
+            if i == len(widths):
+                widths.append(length)
+            elif length > widths[i]:
+                widths[i] = length
+
+    def __header(self) -> Iterator:
+        if self.__columns:
+            yield self.__line(self.__columns)
+            if self.__rule:
+                yield self.__line([self.__rule * i for i in self.__widths[:len(self.__columns)]])
+
+    def __line(self, cells: list) -> str:
+        widths, last = self.__widths, len(cells) - (0 if self.__end else 1)
+        parts = []
+        for i, cell in enumerate(cells):
+            if i < last and i < len(widths):
+                padding = widths[i] - _visible(cell)
+                parts.append(cell + " " * padding if padding > 0 else cell)
+            else:
+                parts.append(cell)
+        if not self.__end:
+            return self.__sep.join(parts).rstrip()
+        return self.__sep.join(parts) + self.__end
+
+
+class Pager:
+    __slots__ = ('__source', '__lines', '__done', '__top', '__search', '__message')
+    def __init__(self, lines: Iterable) -> None:
+        """Terminal pager reading the lines of a text from an iterator only as far as the user scrolls,
+        displayed on the alternate screen so that the scrollback of the terminal is kept.
+
+        Keys:
+            space, f, page down: next page          b, page up: previous page
+            j, enter, down: next line               k, up: previous line
+            g, home: first line                     G, end: last line
+            /text: search forward                   n, N: next and previous match
+            q: quit
+
+        Arguments:
+            lines (iterable): Lines of the text, such as a generator or an open file.
 
         Example of use:
-            >>> import WizardCLI
-            >>> cli = WizardCLI.CLI()
-            >>> @cli.command()
-            >>> def hello_world():
-            ...    print("Hello World")
-            >>> cli.run()
+            >>> WizardCLI.Pager(open("server.log")).show()
         """
-        def decorator(func: callable) -> callable:
-            def wrapper(name: str, doc: str, alias: list) -> None:
-                if doc is None:
-                    doc = ""
-                data = {"function": func}
-                args_info = signature(func).parameters.items()
-                args, options, params = [], [], {}
-                for arg_name, arg_info in args_info:
-                    if arg_info.default == Signature.empty:
-                        args.append((f"[{arg_name}]", arg_info.annotation))
-                    elif arg_info.default is True:
-                        options.append(f"-{arg_name}")
-                    else:
-                        params[f"--{arg_name}"] = (arg_info.annotation, arg_info.default)
-                if doc != "":
-                    data["doc"] = doc
-                if args != []:
-                    data["args"] = args
-                if options != []:
-                    data["options"] = options
-                if params != {}:
-                    data["params"] = params
-                if alias != []:
-                    data["alias"] = [i.lower() for i in alias]
-                name = name.replace(" ", "_").lower()
-                data["info"] = self.__info(name, data)
-                self.__cmd[name] = data
-                self.__cmd.update({i.lower(): name for i in alias})
-            return wrapper(name=name if name else func.__name__, doc=doc if doc else func.__doc__, alias=alias)
-        return decorator
+        self.__source = iter(lines)
+        self.__lines = []
+        self.__done = False
+        self.__top = 0
+        self.__search = ""
+        self.__message = ""
 
-    def leave(self) -> None:
-        "Close the terminal."
-        kill(getpid(), 9)
+    def __fetch(self, index: int) -> bool:
+        "Reads lines from the source until the line index is read, returns False if the text is shorter."
+        lines = self.__lines
+        while len(lines) <= index and not self.__done:
+            line = next(self.__source, None)
+            if line is None:
+                self.__done = True
+            else:
+                lines.append(line.rstrip("\r\n"))
+        return index < len(lines)
 
-    def clear_host(self) -> None:
-        "Reset the display of the terminal."
-        print("\033[H\033[J", end="")
+    def show(self, stream: Optional[object] = None) -> None:
+        """Displays the text, written at once when it fits on the screen or when stream is not a terminal.
 
-    def __format(self, name: str, cmd: dict) -> dict:
-        "Format data of command."
-        data = {}
-        for i in [("alias", []), ("doc", ""), ("args", []), ["params", {}], ["options", []]]:
-            data[i[0]] = cmd.get(i[0], i[1])
-        local = ", ".join(data["alias"])
-        data["la"] = local, len(local)
-        local = name
-        for i in [' '.join(arg[0] for arg in data["args"]), ' '.join(data["params"].keys()), ' '.join(data["options"])]:
-            if len(i) != 0:
-                local += " " + i
-        data["lap"] = local, len(local)
-        return data
+        Arguments:
+            stream (file, optional): Stream displaying the text. Defaults to sys.stdout.
+        """
+        stream = sys.stdout if stream is None else stream
+        size = get_terminal_size()
+        height = max(1, size.lines - 1)
+        if not (stream.isatty() and stdin.isatty()) or not self.__fetch(height):
+            lines = self.__lines
+            for line in self.__source:
+                lines.append(line.rstrip("\r\n"))
+                if len(lines) >= 1000:
+                    stream.write("\n".join(lines) + "\n")
+                    lines.clear()
+            if lines:
+                stream.write("\n".join(lines) + "\n")
+            stream.flush()
+            return
+        stream.write("\033[?1049h")
+        try:
+            while True:
+                self.__draw(stream, height, size.columns)
+                key = _key()
+                if key in ("q", "Q", "\x03"):
+                    break
+                elif key in (" ", "f", "page down"):
+                    self.__scroll(height, height)
+                elif key in ("b", "page up"):
+                    self.__scroll(-height, height)
+                elif key in ("j", "\n", "\r", "down"):
+                    self.__scroll(1, height)
+                elif key in ("k", "up"):
+                    self.__scroll(-1, height)
+                elif key in ("g", "home"):
+                    self.__top = 0
+                elif key in ("G", "end"):
+                    self.__fetch(float("inf"))
+                    self.__top = max(0, len(self.__lines) - height)
+                elif key == "/":
+                    stream.write(f"\033[{height + 1};1H\033[K/")
+                    stream.flush()
+                    self.__search = input()
+                    self.__find(self.__top + 1, 1)
+                elif key == "n":
+                    self.__find(self.__top + 1, 1)
+                elif key == "N":
+                    self.__find(self.__top - 1, -1)
+        finally:
+            stream.write("\033[?1049l")
+            stream.flush()
 
-    def help(self, m: bool = True) -> None:
-        "Displays info about terminal commands."
-        cmds = {}
-        lap = la = 0
-        for name, cmd in self.__cmd.items():
-            if isinstance(cmd, dict):
-                cmds[name] = self.__format(name, cmd)
-                la = max(la, cmds[name]["la"][1])
-                lap = max(lap, cmds[name]["lap"][1])
-        if m:
-            lines = [f"Alias  {cmds[cmd]['la'][0]+(la-cmds[cmd]['la'][1])*' '} -> {cmds[cmd]['lap'][0]+(lap-cmds[cmd]['lap'][1])*' '} {cmds[cmd]['doc']}" for cmd in sorted(cmds)]
-        else:
-            lines = [f"{cmd} - {cmds[cmd]['doc']}" for cmd in sorted(cmds)]
-        max_length = max(len(line.split(" - ")[0]) for line in lines) if not m else 0
-        if not m:
-            lines = [f"{cmd.ljust(max_length)} {cmds[cmd]['doc']}" for cmd in sorted(cmds)]
-        print(self.__strformat("\n".join(lines)))
+    def __scroll(self, lines: int, height: int) -> None:
+        "Moves the first displayed line, without going past the last page."
+        top = max(0, self.__top + lines)
+        if lines > 0 and not self.__fetch(top + height - 1):
+            top = max(0, len(self.__lines) - height)
+        self.__top = top
 
-    def change_directory(self, path: str) -> None:
-        "Allows you to change the location of the terminal in your files."
-        npath = ospath.join(self.__path, path)
-        if ospath.isdir(npath):
-            path = ospath.normpath(npath)
-        else:
-            path = ospath.normpath(path)
-        if ospath.isdir(path):
-            self.__path = str(path).title()
-        else:
-            print(self.__strformat("The path is invalid."))
+    def __find(self, start: int, step: int) -> None:
+        "Moves to the next line containing the searched text, reading the source as needed when searching forward."
+        text, lines = self.__search, self.__lines
+        if not text:
+            return
+        index = start
+        while index >= 0 and self.__fetch(index):
+            line = lines[index]
+            if text in (line if "\033" not in line else _ANSI.sub("", line)):
+                self.__top = index
+                return
+            index += step
+        self.__message = f"Pattern not found: {text}"
 
-    def __decode(self, tpe: object, value: any) -> object:
-        "Format arguments in the types chosen when creating commands."
-        if tpe is Signature.empty:
-            return value
-        elif hasattr(tpe, '__args__'):
-            for member in tpe.__args__:
-                return member(value)
-        return tpe(value)
+    def __draw(self, stream: object, height: int, width: int) -> None:
+        "Displays the visible lines and the status line."
+        self.__fetch(self.__top + height)
+        visible = self.__lines[self.__top:self.__top + height]
+        text = ["\033[H\033[J"]
+        for line in visible:
+            if "\t" in line:
+                line = line.expandtabs()
+            if "\033" not in line:
+                line = line[:width]
+                if self.__search:
+                    line = line.replace(self.__search, f"\033[7m{self.__search}\033[27m")
+            text.append(line + "\n")
+        text.append("\n" * (height - len(visible)))
+        end = "" if self.__done and self.__top + height >= len(self.__lines) else "+"
+        status = self.__message or "q quit, / search, n/N next/previous match"
+        text.append(f"\033[7m lines {self.__top + 1}-{self.__top + len(visible)}{end}  {status} \033[0m")
+        self.__message = ""
+        stream.write("".join(text))
+        stream.flush()
 
-    def __info(self, name: str, data: dict) -> str:
-        "Creates the information message for the commands to add in the cli."
-        usage = f"\nUsage: {name}"
-        txt = ""
-        for i in data:
-            if i == "doc":
-                txt += f"\nDocumentation: {data[i]}"
-            elif i == "args":
-                txt += "\nArgument(s):"
-                for j in data["args"]:
-                    usage += f" {j[0]}"
-                    tp = str(j[1]).replace("<class '", "").replace("'>", "")
-                    txt += f"\n    {j[0].replace('[', '').replace(']', '')}: {tp}"
-            elif i == "params":
-                txt += "\nParameter(s):"
-                for j in data["params"]:
-                    usage += f" {j}"
-                    tpe = str(data['params'][j][0]).replace("<class '", "").replace("'>", "")
-                    if tpe == "None":
-                        tpe = ""
-                    else:
-                        tpe = ": " + tpe
-                    txt += f"\n    {j}{tpe} = {data['params'][j][1]}"
-            elif i == "options":
-                txt += "\nOption(s):"
-                for j in data["options"]:
-                    usage += f" {j}"
-                txt += f" {j}"
-            elif i == "alias":
-                txt += "\nAlias: "
-                txt += ", ".join(data["alias"])
-        return txt[1:] + usage
 
-    def exec(self, cmd: dict, entry: str) -> None:
-        "Runs commands entered by the user."
-        kwargs = {}
-        if cmd.get("options"):
-            for opt in cmd.get("options"):
-                kwargs[opt[1:]] = False
-        index = 1
-        arg_i = 0
-        do = False
-        while index < len(entry):
-            arg = entry[index]
-            if arg.startswith("--"):
-                value = cmd["params"].get(arg)
-                if value is None:
-                    print(self.__strformat("Unknown Parameter"))
-                    do = True
-                    break
-                kwargs[arg[2:]] = None if index + 1 >= len(entry) else self.__decode(value[0], entry[index + 1])
-                index += 1 if kwargs[arg[2:]] is not None else 0
-            elif arg.startswith("-"):
-                if arg[1:] in kwargs:
-                    kwargs[arg[1:]] = True
-                else:
-                    if arg == "-?":
-                        do = True
-                        print(self.__strformat(cmd["info"]))
-                        break
-                    else:
-                        print(self.__strformat("Unknown Option"))
-                        do = True
-                        break
-            else:
-                if arg_i < len(cmd["args"]):
-                    kwargs[cmd["args"][arg_i][0].strip("[]")] = self.__decode(cmd["args"][arg_i][1], arg)
-                    arg_i += 1
-                else:
-                    print(self.__strformat("Too many arguments provided."))
-                    do = True
+_KEYS = {"[A": "up", "[B": "down", "[5~": "page up", "[6~": "page down", "[H": "home", "[F": "end",
+         "H": "up", "P": "down", "I": "page up", "Q": "page down", "G": "home", "O": "end"}
+
+def _key() -> str:
+    "Reads a key press from the terminal without waiting for Enter, arrows and page keys being named."
+    try:
+        from msvcrt import getwch
+    except ImportError:
+        pass
+    else:
+        key = getwch()
+        if key in ("\x00", "\xe0"):
+            return _KEYS.get(getwch(), "")
+        return key
+    from termios import tcgetattr, tcsetattr, TCSADRAIN
+    from tty import setcbreak
+    from select import select
+    fd = stdin.fileno()
+    mode = tcgetattr(fd)
+    try:
+        setcbreak(fd)
+        key = os.read(fd, 1)
+        if key != b"\x1b":
+            while key[0] >= 0xc0 and len(key) < 4 and select([fd], [], [], 0.05)[0]:
+                key += os.read(fd, 1)
+                if key.decode("UTF-8", "ignore"):
                     break
-            index += 1
-        if not do:
-            cmd["function"](**kwargs)
+            return key.decode("UTF-8", "replace")
+        sequence = ""
+        while select([fd], [], [], 0.05)[0]:
+            sequence += os.read(fd, 1).decode("ascii", "replace")
+            if sequence in _KEYS or len(sequence) >= 3:
+                break
+        return _KEYS.get(sequence, "")
+    finally:
+        tcsetattr(fd, TCSADRAIN, mode)
 
-    def run(self) -> None:
-        "This method of the CLI object allows you to launch the CLI after you have created all your commands."
-        while True:
+
+class _HelpTable:
+    __slots__ = ('__rows', '__names', '__widths', '__cache')
+    def __init__(self) -> None:
+        """Help lines of the commands, kept sorted with their column widths as commands are registered,
+        so help only joins cached lines."""
+        self.__rows = {}
+        self.__names = []
+        self.__widths = [0, 0, 0]
+        self.__cache = {}
+
+    def add(self, name: str, row: tuple) -> None:
+        "Adds or replaces the line of a command from its aliases, usage and documentation."
+        if name in self.__rows:
+            self.remove(name)
+        self.__rows[name] = row
+        insort(self.__names, name)
+        widths = self.__widths
+        widths[0] = max(widths[0], len(row[0]))
+        widths[1] = max(widths[1], len(row[1]))
+        widths[2] = max(widths[2], len(name))
+        self.__cache.clear()
+
+    def remove(self, name: str) -> None:
+        "Removes the line of a command."
+        row = self.__rows.pop(name, None)
+        if row is None:
+            return
+        del self.__names[bisect_left(self.__names, name)]
+        if len(row[0]) == self.__widths[0] or len(row[1]) == self.__widths[1] or len(name) == self.__widths[2]:
+            self.__widths = [
+                max((len(i[0]) for i in self.__rows.values()), default=0),
+                max((len(i[1]) for i in self.__rows.values()), default=0),
+                max((len(i) for i in self.__names), default=0)
+            ]
+        self.__cache.clear()
+
+    def __lines(self, names: list, long: bool) -> str:
+        rows = self.__rows
+        if long:
+            table = Table(widths=[6, self.__widths[0], 2, self.__widths[1]], sample=0, sep=" ")
+            return "\n".join(table.render(("Alias ", rows[i][0], "->", rows[i][1], rows[i][2]) for i in names))
+        table = Table(widths=[self.__widths[2]], sample=0, sep=" ")
+        return "\n".join(table.render((i, rows[i][2]) for i in names))
+
+    def render(self, long: bool = True, prefix: str = "", page: int = 0, size: int = 20) -> str:
+        "Returns the help text, only for the commands starting with prefix and on the given page if any."
+        if not prefix and not page:
+            text = self.__cache.get(long)
+            if text is None:
+                text = self.__cache[long] = self.__lines(self.__names, long)
+            return text
+        names = self.__names
+        if prefix:
+            names = names[bisect_left(names, prefix):bisect_left(names, prefix + "\U0010ffff")]
+        if not page:
+            return self.__lines(names, long)
+        pages = max(1, ceil(len(names) / size))
+        text = self.__lines(names[(page - 1) * size:page * size], long)
+        return f"{text}\nPage {page}/{pages}" if text else f"Page {page}/{pages}"
+
+
+class _Trigrams:
+    __slots__ = ('__postings', '__keys')
+    def __init__(self) -> None:
+        """Trigram index of the command names and aliases used to suggest commands.
+        A search only ranks by edit distance the candidates sharing the most trigrams with the query,
+        so its cost does not depend on the size of the registry beyond the posting lists it reads."""
+        self.__postings = {}
+        self.__keys = set()
+
+    @staticmethod
+    def __grams(key: str) -> set:
+        key = f"  {key} "
+        return {key[i:i + 3] for i in range(len(key) - 2)}
+
+    def add(self, key: str) -> None:
+        "Adds key to the index."
+        if key in self.__keys:
+            return
+        self.__keys.add(key)
+        for gram in self.__grams(key):
+            self.__postings.setdefault(gram, []).append(key)
+
+    def remove(self, key: str) -> None:
+        "Removes key from the index."
+        if key not in self.__keys:
+            return
+        self.__keys.discard(key)
+        for gram in self.__grams(key):
+            self.__postings[gram].remove(key)
+
+    def search(self, query: str, limit: int = 3, candidates: int = 32) -> list:
+        "Returns up to limit keys within a small edit distance of query, the closest first."
+        shared = Counter()
+        for gram in self.__grams(query):
+            shared.update(self.__postings.get(gram, ()))
+        best = shared.most_common(candidates)
+        threshold = max(1, min(3, len(query) // 2))
+        ranked = []
+        for key, _ in best:
+            distance = _distance(query, key, threshold)
+            if distance <= threshold:
+                ranked.append((distance, key))
+        return [key for _, key in nsmallest(limit, ranked)]
+
+
+def _distance(a: str, b: str, limit: int) -> int:
+    "Optimal string alignment distance between a and b, returning limit + 1 as soon as it is exceeded."
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+class _Plan(NamedTuple):
+    "Immutable parse plan compiled by CLI.command for each command."
+    function: callable
+    args: tuple
+    nargs: int
+    flags: dict
+    defaults: dict
+    pipe: Optional[str]
+    cache: Optional['_ResultCache']
+    latency: '_Latency'
+    parallel: Optional[tuple]
+    timeout: Optional[float]
+
+
+class _Latency:
+    __slots__ = ('count', 'total', 'samples')
+    def __init__(self, size: int = 1024) -> None:
+        "Latency recorder of a command, keeping the count, total and the last samples in nanoseconds."
+        self.count = 0
+        self.total = 0
+        self.samples = deque(maxlen=size)
+
+    def add(self, duration: int) -> None:
+        self.count += 1
+        self.total += duration
+        self.samples.append(duration)
+
+    def percentiles(self, *ranks: float) -> list:
+        "Returns the percentiles of the recent samples."
+        samples = sorted(self.samples)
+        if not samples:
+            return [0 for _ in ranks]
+        return [samples[min(len(samples) - 1, int(len(samples) * rank / 100))] for rank in ranks]
+
+    def clear(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.samples.clear()
+
+
+class CachePolicy:
+    __slots__ = ('maxsize', 'ttl')
+    def __init__(self, maxsize: Optional[int] = 128, ttl: Optional[float] = None) -> None:
+        """Caching of the results of a command, keyed on its decoded arguments.
+
+        Arguments:
+            maxsize (int, optional): Number of results kept, the least recently used being dropped first. None for no limit. Defaults to 128.
+            ttl (float, optional): Seconds a result stays valid. None for no expiry. Defaults to None.
+
+        Example of use:
+            >>> import WizardCLI
+            >>> @cli.command(cache=WizardCLI.CachePolicy(maxsize=256, ttl=60))
+            >>> def lookup(user: str):
+            ...    return backend.fetch(user)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+
+class _ResultCache:
+    __slots__ = ('__policy', '__entries', '__lock', 'hits', 'misses')
+    def __init__(self, policy: CachePolicy) -> None:
+        "LRU and TTL cache of the results of one command."
+        self.__policy = policy
+        self.__entries = OrderedDict()
+        self.__lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def __freeze(value: any) -> any:
+        if isinstance(value, (list, tuple)):
+            return tuple(_ResultCache.__freeze(i) for i in value)
+        elif isinstance(value, (set, frozenset)):
+            return frozenset(_ResultCache.__freeze(i) for i in value)
+        elif isinstance(value, dict):
+            return tuple(sorted((k, _ResultCache.__freeze(v)) for k, v in value.items()))
+        return value
+
+    def key(self, kwargs: dict) -> Optional[tuple]:
+        "Returns the cache key of the arguments, None if they are not hashable."
+        key = tuple(sorted((k, self.__freeze(v)) for k, v in kwargs.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key: tuple) -> tuple:
+        "Returns (True, result) if a valid result is cached for key, else (False, None)."
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > monotonic()):
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self.__entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: tuple, result: any) -> None:
+        "Stores the result of key, dropping the least recently used result if the cache is full."
+        ttl, maxsize = self.__policy.ttl, self.__policy.maxsize
+        with self.__lock:
+            self.__entries[key] = (None if ttl is None else monotonic() + ttl, result)
+            self.__entries.move_to_end(key)
+            if maxsize is not None and len(self.__entries) > maxsize:
+                self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        "Drops all the cached results."
+        with self.__lock:
+            self.__entries.clear()
+
+    def info(self) -> dict:
+        "Returns the counters of the cache."
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.__entries),
+            "maxsize": self.__policy.maxsize,
+            "ttl": self.__policy.ttl
+        }
+
+
+class _Pipe:
+    __slots__ = ('__queue', '__closed', '__chunk', '__flush')
+    def __init__(self, source: object, size: int, chunk: int = 64, flush: Optional[callable] = None) -> None:
+        """Bounded buffer between two commands of a pipeline.
+        The items of source are produced in a separate thread and handed over by chunks,
+        a chunk being sent early when the producer is slow and the consumer is waiting for it.
+        The thread runs in a copy of the context of the pipeline, so the producer sees its cancellation token.
+        flush is called in that thread once the source is exhausted, to write what the producer displayed."""
+        self.__chunk = max(1, min(chunk, size))
+        self.__flush = flush
+        self.__queue = Queue(maxsize=max(1, size // self.__chunk))
+        self.__closed = Event()
+        if source is None:
+            source = ()
+        elif isinstance(source, (str, bytes)) or not hasattr(source, "__iter__"):
+            source = (source,)
+        Thread(target=copy_context().run, args=(self.__feed, source), daemon=True).start()
+
+    def __put(self, item: tuple) -> None:
+        while not self.__closed.is_set():
             try:
-                entry = splitS(input(self.__prompt.format(self.user, self.__path)))
-                if not entry:
-                    continue
-                cmd = self.__cmd.get(entry[0].lower())
-                if cmd is None:
-                    print(self.__strformat(f"{entry[0]} doesn't exist.\nDo help to get the list of existing commands."))
+                return self.__queue.put(item, timeout=0.1)
+            except Full:
+                continue
+
+    def __feed(self, source: object) -> None:
+        chunk = []
+        size, empty = self.__chunk, self.__queue.empty
+        last = perf_counter()
+        error = None
+        try:
+            for item in source:
+                chunk.append(item)
+                if len(chunk) >= size or (perf_counter() - last > 0.01 and empty()):
+                    self.__put((chunk, None))
+                    chunk = []
+                    last = perf_counter()
+                    if self.__closed.is_set():
+                        return
+        except BaseException as e:
+            error = e
+        finally:
+            if self.__flush is not None:
+                self.__flush()
+        if chunk:
+            self.__put((chunk, None))
+        self.__put((None, error))
+
+    def __iter__(self) -> Iterator:
+        get = self.__queue.get
+        try:
+            while True:
+                chunk, error = get()
+                if chunk is None:
+                    if error is not None:
+                        raise error
+                    return
+                yield from chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        "Stops the producer thread."
+        self.__closed.set()
+
+
+_CONVERTERS = {}
+_BOOLEANS = {"true": True, "1": True, "yes": True, "y": True, "on": True,
+             "false": False, "0": False, "no": False, "n": False, "off": False}
+
+
+def converter(tpe: object) -> callable:
+    """
+    Registers the function converting the text entered by the user into the type tpe,
+    for the commands registered after it.
+
+    Example of use:
+        >>> import WizardCLI
+        >>> @WizardCLI.converter(Point)
+        >>> def point(value: str) -> Point:
+        ...     x, y = value.split(":")
+        ...     return Point(float(x), float(y))
+    """
+    def decorator(func: callable) -> callable:
+        _CONVERTERS[tpe] = func
+        return func
+    return decorator
+
+
+def _converter(tpe: object) -> Optional[callable]:
+    "Compiles once the callable converting the text of an argument to its annotation, None if the text is kept as is."
+    if tpe is Signature.empty or tpe is str:
+        return None
+    try:
+        if tpe in _CONVERTERS:
+            return _CONVERTERS[tpe]
+    except TypeError:
+        pass
+    origin, args = get_origin(tpe), get_args(tpe)
+    if origin is Union or origin is UnionType:
+        members = [i for i in args if i is not NoneType]
+        if len(members) == 1:
+            return _converter(members[0])
+        convs = [_converter(i) for i in members]
+        names = " or ".join(getattr(i, "__name__", str(i)) for i in members)
+        def convert(value: str) -> any:
+            for conv in convs:
+                if conv is None:
+                    return value
+                try:
+                    return conv(value)
+                except (ValueError, TypeError):
                     continue
-                if isinstance(cmd, str):
-                    cmd = self.__cmd[cmd]
-                self.exec(cmd, entry)
-            except KeyboardInterrupt:
-                kill(getpid(), 9)
-            except Exception as e:
-                print(self.__strformat(f"An unexpected error occurred: {e}"))
+            raise ValueError(f"{value!r} is not {names}")
+        return convert
+    if origin is Literal:
+        choices = {str(i): i for i in args}
+        def convert(value: str) -> any:
+            if value in choices:
+                return choices[value]
+            raise ValueError(f"{value!r} is not one of {', '.join(choices)}")
+        return convert
+    if tpe is bool:
+        def convert(value: str) -> bool:
+            try:
+                return _BOOLEANS[value.lower()]
+            except KeyError:
+                raise ValueError(f"{value!r} is not a boolean") from None
+        return convert
+    if isinstance(tpe, type) and issubclass(tpe, Enum):
+        members = {i.name.lower(): i for i in tpe}
+        members.update({str(i.value).lower(): i for i in tpe})
+        def convert(value: str) -> Enum:
+            try:
+                return members[value.lower()]
+            except KeyError:
+                raise ValueError(f"{value!r} is not one of {', '.join(i.name.lower() for i in tpe)}") from None
+        return convert
+    container = origin if origin is not None else tpe
+    if container in (list, tuple, set, frozenset):
+        if container is tuple and len(args) > 1 and args[-1] is not Ellipsis:
+            convs = [_converter(i) for i in args]
+            def convert(value: str) -> tuple:
+                items = value.split(",")
+                if len(items) != len(convs):
+                    raise ValueError(f"{value!r} needs {len(convs)} comma separated values")
+                return tuple(item if conv is None else conv(item) for conv, item in zip(convs, items))
+            return convert
+        item = _converter(args[0]) if args else None
+        def convert(value: str) -> any:
+            items = value.split(",") if value else []
+            return container(items if item is None else map(item, items))
+        return convert
+    if origin is not None and args:
+        return _converter(args[0])
+    return tpe
+
+
+def _record(item: any) -> any:
+    "Returns a dataclass or a named tuple as a dict, other values unchanged."
+    if is_dataclass(item) and not isinstance(item, type):
+        return {field.name: getattr(item, field.name) for field in fields(item)}
+    elif isinstance(item, tuple) and hasattr(item, "_asdict"):
+        return item._asdict()
+    return item
+
+def _records(result: any) -> Optional[Iterator]:
+    "Returns an iterator over the records of a result made of several, None for a single value."
+    if isinstance(result, (str, bytes, dict)) or not isinstance(result, Iterable) or hasattr(result, "_asdict"):
+        return None
+    return map(_record, result)
+
+def _json(result: any) -> Iterator:
+    "Renders a result as one JSON document, an array with one item per line for several records."
+    records = _records(result)
+    if records is None:
+        yield dumps(_record(result), default=str)
+        return
+    yield "["
+    previous = None
+    for record in records:
+        if previous is not None:
+            yield previous + ","
+        previous = dumps(record, default=str)
+    if previous is not None:
+        yield previous
+    yield "]"
+
+def _ndjson(result: any) -> Iterator:
+    "Renders a result as one JSON document per line and record."
+    records = _records(result)
+    for record in ([_record(result)] if records is None else records):
+        yield dumps(record, default=str)
+
+def _columns(record: any) -> list:
+    return list(record) if isinstance(record, dict) else ["value"]
+
+def _row(record: any, columns: list) -> list:
+    if isinstance(record, dict):
+        return ["" if record.get(i) is None else record.get(i) for i in columns]
+    return [record]
+
+def _csv(result: any) -> Iterator:
+    "Renders a result as CSV, the columns being the keys of the first record."
+    records = _records(result)
+    records = iter([_record(result)] if records is None else records)
+    first = next(records, None)
+    if first is None:
+        return
+    columns = _columns(first)
+    buffer = StringIO()
+    write = csv_writer(buffer, lineterminator="").writerow
+    def line(values: list) -> str:
+        write(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+    yield line(columns)
+    yield line(_row(first, columns))
+    for record in records:
+        yield line(_row(record, columns))
+
+def _table(result: any, sample: int = 100) -> Iterator:
+    "Renders a result as a table, the columns being the keys of the first records."
+    records = _records(result)
+    records = iter([_record(result)] if records is None else records)
+    head = list(islice(records, sample))
+    if not head:
+        return
+    columns = list(dict.fromkeys(column for record in head for column in _columns(record)))
+    rows = (_row(record, columns) for record in chain(head, records))
+    yield from Table(columns, sample=sample).render(rows)
+
+_RENDERERS = {"json": _json, "ndjson": _ndjson, "table": _table, "csv": _csv}
+
+
+def _call(function: callable, kwargs: dict) -> tuple:
+    "Runs one call of a parallel command in a worker process, capturing what it prints."
+    output = StringIO()
+    with redirect_stdout(output):
+        try:
+            result, error = function(**kwargs), None
+            if iscoroutine(result):
+                from asyncio import run
+                result = run(result)
+            if isinstance(result, Iterator):
+                result = list(result)
+        except Exception as e:
+            result, error = None, e
+    return output.getvalue(), result, error
+
+
+_WORDS = recompile(r"[^ \t\r\n]+")
+_OPERATORS = ("|", "&")
+_PIECES = recompile(r"""([^ \t\r\n'"\\]+)|'([^']*)'|"((?:[^"\\]|\\.)*)"|\\(.)|([ \t\r\n]+)|(.)""", DOTALL)
+_ESCAPED = recompile(r'\\(["\\])')
+
+class _Operator(str):
+    "Unquoted | or & token of a command line, equal to the string but told apart from a quoted one with isinstance."
+    __slots__ = ()
+
+
+def tokenize(line: str) -> list:
+    """Splits a command line into tokens like shlex.split in POSIX mode, several times faster.
+    Lines without quotes or backslashes are split by a single regex, the others piece by piece;
+    unbalanced quotes and trailing backslashes are left to shlex.split, which raises the ValueError.
+    Unquoted | and & tokens are marked as operators, so that "|" or '&' given as arguments stay arguments.
+
+    Example of use:
+        >>> WizardCLI.tokenize('deploy "my app" --env prod')
+        ['deploy', 'my app', '--env', 'prod']
+    """
+    if "'" not in line and '"' not in line and "\\" not in line:
+        tokens = _WORDS.findall(line)
+        if "|" in line or "&" in line:
+            tokens = [_Operator(i) if i in _OPERATORS else i for i in tokens]
+        return tokens
+    tokens, token, started, quoted = [], [], False, False
+    for piece in _PIECES.finditer(line):
+        kind = piece.lastindex
+        if kind == 5:
+            if started:
+                word = "".join(token)
+                tokens.append(_Operator(word) if not quoted and word in _OPERATORS else word)
+                token, started, quoted = [], False, False
+        elif kind == 6:
+            return splitS(line)
+        else:
+            started = True
+            quoted = quoted or kind != 1
+            token.append(_ESCAPED.sub(r"\1", piece.group(3)) if kind == 3 else piece.group(kind))
+    if started:
+        word = "".join(token)
+        tokens.append(_Operator(word) if not quoted and word in _OPERATORS else word)
+    return tokens
 
 
 def optional(*defaults):
@@ -315,12 +3253,22 @@ def optional(*defaults):
     return decorator
 
 
+_FILES = WeakValueDictionary()
+
+def _flush_files() -> None:
+    "Writes the pending changes of all the live File objects."
+    for file in list(_FILES.values()):
+        file.flush()
+
+atexit.register(_flush_files)
+
+
 class File:
     __slots__ = (
         '__name', '__ext', '__path', '__encoding', '__binary',
         '__created', '__last_modif', '__perm', '__lines',
-        '__tasks', '__index', '__thread', '__lock',
-        '__processing', '__shutdown', '__current_path'
+        '__tasks', '__index', '__thread', '__lock', '__io',
+        '__processing', '__shutdown', '__current_path', '__weakref__'
     )
 
     def __init__(self, path: str, encoding: str = "UTF-8") -> None:
@@ -335,6 +3283,7 @@ class File:
             >>> file = WizardCLI.File("test.txt", "UTF-8")
         """
         self.__lock = Lock()
+        self.__io = Lock()
         self.__thread = None
         self.__processing = False
         self.__shutdown = False
@@ -347,6 +3296,7 @@ class File:
             "ab": None,
         }
         self.__current_path = path
+        _FILES[id(self)] = self
         self.__name, self.__ext = ospath.splitext(ospath.basename(path))
         self.__path = ospath.dirname(path)
         self.__encoding = encoding
@@ -400,6 +3350,18 @@ class File:
         "Splits the file into lines."
         return self.__str__().split(sep, maxsplit)
 
+    def lines(self) -> Iterator:
+        """Yields the lines of the file, decoded by blocks of 64 KiB instead of all at once."""
+        binary = self.__binary
+        decoder = getincrementaldecoder(self.__encoding)("replace")
+        rest = ""
+        for start in range(0, len(binary), 65536):
+            lines = (rest + decoder.decode(binary[start:start + 65536], start + 65536 >= len(binary))).split("\n")
+            rest = lines.pop()
+            yield from lines
+        if rest:
+            yield rest
+
     def __bool__(self) -> bool:
         """Returns True if the file is not empty."""
         return bool(self.__binary)
@@ -502,9 +3464,9 @@ class File:
                     self.__tasks["wb"] = args
                     self.__tasks["ab"] = None
                 case _:
-                    if self.__tasks["wb"]:
+                    if self.__tasks["wb"] is not None:
                         self.__tasks["wb"] = self.__binary
-                    elif self.__tasks["ab"]:
+                    elif self.__tasks["ab"] is not None:
                         self.__tasks["ab"] += args
                     else:
                         self.__tasks["ab"] = args
@@ -518,11 +3480,15 @@ class File:
         """Executes all scheduled tasks in a separate thread."""
         while self.__processing and not self.__shutdown:
             sleep(0.05)
-            with self.__lock:
-                if not any(self.__tasks.values()):
-                    continue
+            self.flush()
 
-                tasks_to_execute = self.__tasks.copy()
+    def flush(self) -> None:
+        """Executes the scheduled tasks now, in the calling thread."""
+        with self.__io:
+            with self.__lock:
+                if all(i is None for i in self.__tasks.values()):
+                    return
+                tasks_to_execute = self.__tasks
                 self.__tasks = {
                     "rename": None,
                     "move": None,
@@ -538,26 +3504,24 @@ class File:
                 move(current_path, new_path)
                 self.__current_path = new_path
 
-            current_path = self.__current_path
-            if tasks_to_execute["wb"]:
-                data, path = tasks_to_execute["wb"]
-                with open(path, "wb") as f:
-                    f.write(data)
-            elif tasks_to_execute["ab"]:
-                data, path = tasks_to_execute["ab"]
-                with open(path, "ab") as f:
-                    f.write(data)
+            if tasks_to_execute["wb"] is not None:
+                with open(self.__current_path, "wb") as f:
+                    f.write(tasks_to_execute["wb"])
+            elif tasks_to_execute["ab"] is not None:
+                with open(self.__current_path, "ab") as f:
+                    f.write(tasks_to_execute["ab"])
 
     def __del__(self) -> None:
         """Destructor that ensures proper thread cleanup before object deletion."""
         self.close()
 
     def close(self) -> None:
-        """Ferme proprement le fichier."""
+        """Ferme proprement le fichier, après avoir écrit les tâches en attente."""
         self.__shutdown = True
         self.__processing = False
         if self.__thread and self.__thread.is_alive():
             self.__thread.join()
+        self.flush()
 
     def __enter__(self):
         """Context manager support."""
@@ -1,7 +1,6 @@
 from typing import Optional, Union
 from re import compile as recompile, split, sub
 from functools import lru_cache
-from PIL import Image
 from shutil import get_terminal_size
 
 
@@ -217,6 +216,7 @@ def strk() -> str:
 @lru_cache(maxsize=256)
 def __RGBA(path: str, width: int, height: int) -> str:
     """Converts an image to colored ASCII with alpha channel management."""
+    from PIL import Image
     result = []
     last_color = None
     append = result.append
@@ -253,6 +253,7 @@ def __RGBA(path: str, width: int, height: int) -> str:
 @lru_cache(maxsize=128)
 def __RGB(path: str, width: int, height: int, mode: bool = True) -> str:
     """Converts an image to colored ASCII without alpha channel management."""
+    from PIL import Image
     result = []
     last_color = None
     append = result.append
@@ -272,6 +273,7 @@ def __RGB(path: str, width: int, height: int, mode: bool = True) -> str:
 @lru_cache(maxsize=32)
 def __P(path: str, width: int, height: int) -> str:
     """Converts an image to colored ASCII with transparency handling."""
+    from PIL import Image
     result = []
     last_color = None
     append = result.append
@@ -302,6 +304,7 @@ def strimg(path: str, width: Optional[int] = None, height: Optional[int] = None,
         Example of use:
             result = strimg("image.png", width=80, termadj=True)
     """
+    from PIL import Image
     try:
         img = Image.open(path)
     except FileNotFoundError:
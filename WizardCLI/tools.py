@@ -1,10 +1,9 @@
-from pympler import asizeof
 from functools import wraps
 from typing import Optional
 from inspect import stack
-from re import compile as recompile
 from time import perf_counter_ns, process_time_ns
 from sys import stdout, getsizeof
+from .core import Table
 from typing import Optional
 from gc import disable as gc_disable, enable as gc_enable
 
@@ -61,10 +60,6 @@ class Benchmark:
             print("Aucune fonction à tester.")
             return
 
-        ansi_escape = recompile(r'\033\[[0-9;]*m')
-        def strip_ansi(text: str) -> str:
-            return ansi_escape.sub('', text)
-        
         results = [self.__tests(func) for func, _ in self.__funcs]
         names = [name for _, name in self.__funcs]
         times = [res[0] for res in results]
@@ -101,25 +96,15 @@ class Benchmark:
             return line
         colored_times = colorize(times, ref_time, True)
         colored_sizes = colorize(sizes, ref_size, False)
-        col_widths = []
-        for col_idx in range(len(self.__funcs)):
-            max_width = max(
-                len(strip_ansi(names[col_idx])),
-                len(strip_ansi(colored_times[col_idx])),
-                len(strip_ansi(colored_sizes[col_idx]))
-            )
-            col_widths.append(max_width)
-
-        total_width = 20 + 1 + sum(w + 1 for w in col_widths)
+        table = Table(widths=[20], sep="|", end="|")
+        rows = list(table.render([
+            ["Metric", *names],
+            ["Time (ns)", *colored_times],
+            ["Size (bytes)", *colored_sizes]
+        ]))
+        total_width = sum(w + 1 for w in table.widths)
         separator = "-" * total_width
 
-        def print_row(label: str, row_data: list) -> None:
-            row_parts = [f"{label:<20}|"]
-            for val, width in zip(row_data, col_widths):
-                clean_val = strip_ansi(val)
-                padding = width - len(clean_val)
-                row_parts.append(f"{val}{' ' * padding}|")
-            stdout.write(''.join(row_parts) + '\n')
         title_parts = [" Benchmark"]
         if self.__args:
             title_parts.append(f"| Paramètres : {', '.join(map(str, self.__args))}")
@@ -131,14 +116,11 @@ class Benchmark:
         output_lines = [
             separator,
             f"{title:^{total_width}}",
+            separator,
+            *rows,
             separator
         ]
-        
-        stdout.write(f"{'\n'.join(output_lines)}\n")
-        print_row("Metric", names)
-        print_row("Time (ns)", colored_times)
-        print_row("Size (bytes)", colored_sizes)
-        stdout.write(f"{separator}\n")
+        stdout.write("\n".join(output_lines) + "\n")
 
 
 def gram() -> tuple:
@@ -156,6 +138,7 @@ def gram() -> tuple:
         >>> print(memory)
         >>> print("Total memory usage:", total_memory, "bytes")
     """
+    from pympler import asizeof
     memory = {}
     gmemory = 0
     frame = stack()[1][0].f_globals
@@ -0,0 +1,51 @@
+"""
+Tokenizer conformance check and benchmark.
+
+Checks that WizardCLI.tokenize returns the same tokens as shlex.split,
+or raises the same ValueError, on hand-written cases and on random lines
+built from the characters that matter to the quoting rules, then compares
+the speed of both on typical command lines.
+
+Run with:
+    python benchmarks/bench_tokenize.py [random lines]
+"""
+from random import Random
+from shlex import split
+from sys import argv
+import WizardCLI
+
+CASES = [
+    "", "   ", "help", "  db   migrate  3 ", "a\tb\r\nc",
+    "say 'hello world'", 'say "hello world"', "it\\'s", 'a"b c"d', "''", '""', "a '' b",
+    '"a \\" b"', '"a \\\\ b"', '"a \\x b"', "'a \\ b'", "a\\ b", "a\\\\b", "\\a", "a\\\nb",
+    "'\"'", "\"'\"", "'a'\"b\"c", "x=\"1 2\" y='3 4'", "--name \"Jean Dupont\" -v",
+    "café à b", "a\x0bb", "'unclosed", '"unclosed', 'trailing\\', '"a\\"',
+]
+ALPHABET = "ab '\"\\\t\n"
+
+def outcome(func: callable, line: str) -> object:
+    try:
+        return func(line)
+    except ValueError as e:
+        return ValueError, str(e)
+
+def check(lines: int) -> int:
+    failures = 0
+    rand = Random(0)
+    randoms = ["".join(rand.choice(ALPHABET) for _ in range(rand.randint(0, 12))) for _ in range(lines)]
+    for line in CASES + randoms:
+        expected, got = outcome(split, line), outcome(WizardCLI.tokenize, line)
+        if expected != got:
+            failures += 1
+            print(f"MISMATCH {line!r}: shlex {expected!r}, tokenize {got!r}")
+    print(f"{len(CASES) + lines} lines checked, {failures} mismatch(es)")
+    return failures
+
+if __name__ == "__main__":
+    if check(int(argv[1]) if len(argv) > 1 else 100000):
+        raise SystemExit(1)
+    for line in ("db migrate 3 --force -v", 'deploy "my app" --env prod --tag \'v1.2 rc\''):
+        bench = WizardCLI.Benchmark(line, repeat=100000)
+        bench.add(split, alias="shlex.split")
+        bench.add(WizardCLI.tokenize, alias="tokenize")
+        bench.run()
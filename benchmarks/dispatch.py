@@ -0,0 +1,31 @@
+"""
+Dispatch micro-benchmark.
+
+Measures the cost of CLI.dispatch on already tokenized lines, which is
+the parse-plan loop of CLI.exec plus the registry lookup.
+
+Run with:
+    python benchmarks/dispatch.py
+"""
+import WizardCLI
+
+cli = WizardCLI.CLI()
+
+@cli.command(alias=["n"])
+def noop() -> None:
+    pass
+
+@cli.command()
+def positional(a: int, b: float, c: str, d) -> None:
+    pass
+
+@cli.command()
+def flags(a: int, verbose=True, dry=True, count: int = 0, label: str = "") -> None:
+    pass
+
+bench = WizardCLI.Benchmark(repeat=100000)
+bench.add(lambda: cli.dispatch(["noop"]), alias="noop")
+bench.add(lambda: cli.dispatch(["n"]), alias="alias")
+bench.add(lambda: cli.dispatch(["positional", "1", "2.5", "x", "y"]), alias="positional")
+bench.add(lambda: cli.dispatch(["flags", "1", "-verbose", "--count", "3", "--label", "x", "-dry"]), alias="flags")
+bench.run()
@@ -0,0 +1,38 @@
+"""
+Cold-start benchmark.
+
+Measures, in a fresh interpreter each time, the wall time of importing
+WizardCLI, registering a command and dispatching it once with CLI.main.
+A bare interpreter start is measured as the reference.
+
+Run with:
+    python benchmarks/startup.py [runs]
+"""
+from subprocess import run
+from sys import executable, argv
+from time import perf_counter_ns
+from statistics import mean, median
+
+SCRIPT = """
+import WizardCLI
+cli = WizardCLI.CLI()
+@cli.command()
+def hello(name: str = "World") -> None:
+    pass
+raise SystemExit(cli.main(["hello", "--name", "bench"]))
+"""
+
+def measure(code: str, runs: int) -> list:
+    times = []
+    for _ in range(runs):
+        start = perf_counter_ns()
+        run([executable, "-c", code], check=True)
+        times.append(perf_counter_ns() - start)
+    return times
+
+if __name__ == "__main__":
+    runs = int(argv[1]) if len(argv) > 1 else 20
+    for label, code in (("interpreter", "pass"), ("import+dispatch", SCRIPT)):
+        times = measure(code, runs)
+        print(f"{label:<16} min {min(times) / 1e6:8.2f} ms  "
+              f"median {median(times) / 1e6:8.2f} ms  mean {mean(times) / 1e6:8.2f} ms")
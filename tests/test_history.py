@@ -0,0 +1,59 @@
+from array import array
+import pytest
+import WizardCLI
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "history")
+
+def entries(history) -> list:
+    return [history[i] for i in range(len(history))]
+
+def reopen(path: str) -> list:
+    history = WizardCLI.History(path)
+    try:
+        return entries(history)
+    finally:
+        history.close()
+
+def test_append_search_and_reload(path):
+    history = WizardCLI.History(path)
+    for line in ("db migrate 3", "deploy app", "db rollback", "help"):
+        history.append(line)
+    assert len(history) == 4
+    assert history[-1] == "help"
+    assert history.tail(2) == [(2, "db rollback"), (3, "help")]
+    assert list(history.search("db")) == [(2, "db rollback"), (0, "db migrate 3")]
+    assert list(history.search("d", prefix=True, before=2)) == [(1, "deploy app"), (0, "db migrate 3")]
+    history.close()
+    assert reopen(path) == ["db migrate 3", "deploy app", "db rollback", "help"]
+
+def test_sessions_sharing_a_file(path):
+    a, b = WizardCLI.History(path), WizardCLI.History(path)
+    a.append("first from a")
+    b.append("first from b")
+    a.append("second from a")
+    assert entries(a) == ["first from a", "first from b", "second from a"]
+    assert list(a.search("from b")) == [(1, "first from b")]
+    b.append("second from b")
+    assert entries(b) == ["first from a", "first from b", "second from a", "second from b"]
+    a.close()
+    b.close()
+    assert reopen(path) == ["first from a", "first from b", "second from a", "second from b"]
+
+@pytest.mark.parametrize("offsets", [
+    [0, 4, 4, 8],       # duplicate
+    [0, 6, 8, 12],      # inside a line
+    [0, 8, 12],         # missing line
+    [0, 4, 8, 12, 16],  # past the end
+    [4, 8],             # missing first line
+    [],
+])
+def test_broken_index_is_repaired(path, offsets):
+    with open(path, "wb") as f:
+        f.write(b"one\ntwo\nsix\nten")
+    with open(path + ".idx", "wb") as f:
+        array("Q", offsets).tofile(f)
+    assert reopen(path) == ["one", "two", "six", "ten"]
+    with open(path + ".idx", "rb") as f:
+        assert f.read() == array("Q", [0, 4, 8, 12]).tobytes()
@@ -0,0 +1,85 @@
+import json
+import socket
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="serve needs Unix sockets")
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVER = """
+import sys, time
+import WizardCLI
+cli = WizardCLI.CLI()
+
+@cli.command()
+def hello():
+    cli.echo("hello")
+
+@cli.command()
+def flood():
+    while True:
+        cli.echo("x" * 1000)
+
+@cli.command()
+def slow():
+    print("starting")
+    time.sleep(2)
+    print("done")
+
+cli.serve(sys.argv[1])
+"""
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / "cli.sock")
+    script = tmp_path / "server.py"
+    script.write_text(SERVER)
+    process = subprocess.Popen([sys.executable, str(script), path], cwd=ROOT,
+                               env={"PYTHONPATH": str(ROOT), "PATH": ""})
+    deadline = time.monotonic() + 10
+    while not Path(path).exists():
+        assert time.monotonic() < deadline, "server did not start"
+        time.sleep(0.05)
+    yield path
+    process.kill()
+    process.wait()
+
+def connect(path: str, *argv: str) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    sock.sendall(json.dumps(list(argv)).encode() + b"\n")
+    return sock
+
+def frames(sock: socket.socket, timeout: float):
+    "Yields the time of arrival, kind and data of the frames sent by the server."
+    sock.settimeout(timeout)
+    stream = sock.makefile("rb")
+    start = time.monotonic()
+    while True:
+        header = stream.read(5)
+        if len(header) < 5:
+            return
+        kind, size = struct.unpack("!cI", header)
+        yield time.monotonic() - start, kind, stream.read(size)
+        if kind == b"x":
+            return
+
+def test_stalled_client_does_not_block_others(server):
+    stalled = connect(server, "flood")
+    time.sleep(1)
+    with connect(server, "hello") as sock:
+        received = list(frames(sock, 5))
+    stalled.close()
+    assert received[-1][1:] == (b"x", b"0")
+    assert b"".join(data for _, kind, data in received if kind == b"o") == b"hello\n"
+
+def test_output_is_streamed_before_the_command_ends(server):
+    with connect(server, "slow") as sock:
+        received = list(frames(sock, 5))
+    output = [(at, data) for at, kind, data in received if kind == b"o"]
+    assert output[0][1].startswith(b"starting")
+    assert output[0][0] < 1
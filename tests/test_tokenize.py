@@ -0,0 +1,42 @@
+from random import Random
+from shlex import split
+import pytest
+import WizardCLI
+
+CASES = [
+    "", "   ", "help", "  db   migrate  3 ", "a\tb\r\nc",
+    "say 'hello world'", 'say "hello world"', "it\\'s", 'a"b c"d', "''", '""', "a '' b",
+    '"a \\" b"', '"a \\\\ b"', '"a \\x b"', "'a \\ b'", "a\\ b", "a\\\\b", "\\a", "a\\\nb",
+    "'\"'", "\"'\"", "'a'\"b\"c", "x=\"1 2\" y='3 4'", "--name \"Jean Dupont\" -v",
+    "café à b", "a\x0bb", "'unclosed", '"unclosed', 'trailing\\', '"a\\"',
+    "a | b", "a '|' b", "a & ", 'a "&"', "a \\| b",
+]
+ALPHABET = "ab '\"\\\t\n|&"
+
+def outcome(func: callable, line: str) -> object:
+    try:
+        return func(line)
+    except ValueError as e:
+        return ValueError, str(e)
+
+@pytest.mark.parametrize("line", CASES)
+def test_cases_match_shlex(line):
+    assert outcome(WizardCLI.tokenize, line) == outcome(split, line)
+
+def test_random_lines_match_shlex():
+    rand = Random(0)
+    for _ in range(20000):
+        line = "".join(rand.choice(ALPHABET) for _ in range(rand.randint(0, 12)))
+        assert outcome(WizardCLI.tokenize, line) == outcome(split, line), line
+
+@pytest.mark.parametrize("line, operators", [
+    ("produce | consume", [False, True, False]),
+    ("say '|'", [False, False]),
+    ('say x --sep "|"', [False, False, False, False]),
+    ("say \\|", [False, False]),
+    ("backup &", [False, True]),
+    ('say hi "&"', [False, False, False]),
+    ("say 'a b' | count &", [False, False, True, False, True]),
+])
+def test_only_unquoted_operators_are_marked(line, operators):
+    assert [type(i) is not str for i in WizardCLI.tokenize(line)] == operators